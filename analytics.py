@@ -0,0 +1,222 @@
+"""Indexed metric store & summary helpers over the processed frames"""
+import numpy as np
+import pandas as pd
+
+from data_loader import HUB_BRANCH_MAP, ORG_HUB_LOOKUP, TOTAL_METRICS, restore_float
+from profiling import profiled
+
+# === Metric Store ===
+STORE_INDEX = ["데이터셋", "구분", "본부", "지사"]
+RATE_METRICS = [m for m in TOTAL_METRICS if "정지율" in m]
+
+@profiled()
+def build_metric_store(df_total):
+    """Pivots the long df_total into a wide (데이터셋, 구분, 본부, 지사) x 지표 matrix.
+
+    Duplicate org rows are combined the way the summaries read them: counts/amounts summed, rates averaged.
+    """
+    if df_total is None or df_total.empty:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=STORE_INDEX), columns=TOTAL_METRICS, dtype=float)
+    grouped = df_total.assign(값=restore_float(df_total['값'].to_numpy())).groupby(STORE_INDEX + ["지표"], sort=False, observed=True)['값']
+    wide = grouped.sum().unstack("지표")
+    rates = [m for m in RATE_METRICS if m in wide.columns]
+    if rates: wide[rates] = grouped.mean().unstack("지표")[rates]
+    return wide.reindex(columns=TOTAL_METRICS).sort_index()
+
+def metric_rows(store, dataset, kind, hub=None):
+    """Wide rows for one dataset/구분 (and optionally one 본부); index is 지사 when hub is given"""
+    key = (dataset, kind) if hub is None else (dataset, kind, hub)
+    try: return store.loc[key]
+    except KeyError: return store.iloc[0:0].droplevel(list(range(len(key))))
+
+def org_metrics(store, dataset, org):
+    """Metric values (Series indexed by 지표) of a single hub/branch row, or None"""
+    kind = "본부" if org in HUB_BRANCH_MAP else "지사"
+    key = (dataset, kind, ORG_HUB_LOOKUP.get(org, org), org)
+    return store.loc[key] if key in store.index else None
+
+def to_percent(rate):
+    """Excel decimal rates (< 1) -> percent"""
+    return rate * 100 if rate < 1 else rate
+
+def percent_columns(df, cols):
+    """Column-wise to_percent: values below 1 are scaled by 100, everything else (incl. NaN) kept"""
+    df = df.copy()
+    df[cols] = df[cols].mask(df[cols] < 1, df[cols] * 100)
+    return df
+
+# === Trend Index ===
+TREND_COLUMNS = ["날짜", "본부", "지사", "비율", "월", "이전비율", "MoM"]
+
+@profiled()
+def build_trend_index(df_rate):
+    """Sorts a rate frame once and indexes each branch's block of it.
+
+    Returns {"frame": rows sorted by 지사, 날짜, "bounds": {지사: (start, stop) row slice of "frame"},
+    "latest": last row per 지사, "empty": empty template}; every row carries the previous month's 비율
+    ('이전비율') and the month-over-month delta ('MoM').
+    """
+    if df_rate is None or df_rate.empty or not {'지사', '날짜', '비율'} <= set(df_rate.columns):
+        empty = pd.DataFrame(columns=TREND_COLUMNS)
+        return {"frame": empty, "bounds": {}, "latest": empty.set_index('지사'), "empty": empty}
+
+    df = df_rate.sort_values(['지사', '날짜'], kind='stable')
+    df['비율'] = restore_float(df['비율'].to_numpy())
+    by_branch = df.groupby('지사', sort=False)
+    df['이전비율'] = by_branch['비율'].shift(1)
+    df['MoM'] = df['비율'] - df['이전비율']
+
+    by_branch = df.groupby('지사', sort=False)
+    return {
+        "frame": df,
+        "bounds": {br: (idx[0], idx[-1] + 1) for br, idx in by_branch.indices.items()},
+        "latest": by_branch.tail(1).set_index('지사'),
+        "empty": df.iloc[0:0]
+    }
+
+def trend_series(trend_index, branch):
+    """Date-sorted rate rows of one branch, sliced from the sorted frame (empty frame with the same columns if absent)"""
+    bounds = trend_index["bounds"].get(branch)
+    return trend_index["empty"] if bounds is None else trend_index["frame"].iloc[slice(*bounds)]
+
+def latest_mom(trend_index, branch):
+    """Month-over-month delta of the branch's latest rate, or None with fewer than two months"""
+    latest = trend_index["latest"]
+    if branch not in latest.index: return None
+    mom = latest.at[branch, 'MoM']
+    return None if pd.isna(mom) else mom
+
+# === Summary Helpers ===
+def process_branch_bm_data(store, branch_name):
+    # Use 'Total' dataset to match Hub Summary values (e.g. Row 6 Cols E/F)
+    row = org_metrics(store, 'Total', branch_name)
+    if row is None: return None
+
+    def get_val(metric):
+        return row.get(metric, 0.0)
+
+    bm_data = [
+        {"BM": "L형", "건수": get_val("L형 건"), "금액": get_val("L형 월정료"), "정지율": to_percent(get_val("L형 정지율"))},
+        {"BM": "i형", "건수": get_val("i형 건"), "금액": get_val("i형 월정료"), "정지율": to_percent(get_val("i형 정지율"))}
+    ]
+    return pd.DataFrame(bm_data)
+
+# Hub summary column -> (지표, aggregation)
+HUB_SUMMARY_COLUMNS = {
+    "총건수": ("L+i형 건", "sum"), "L건수": ("L형 건", "sum"), "i건수": ("i형 건", "sum"),
+    "총금액": ("L+i형 월정료", "sum"), "L금액": ("L형 월정료", "sum"), "i금액": ("i형 월정료", "sum"),
+    # Use Exact Matches to avoid mixing with 'Amount Rates' (Col M, etc.)
+    "정지율": ("L+i형 정지율", "mean"), "L정지율": ("L형 정지율", "mean"), "i정지율": ("i형 정지율", "mean")
+}
+
+@profiled()
+def get_hub_summary(store):
+    """One row per hub in HUB_BRANCH_MAP order, every count/amount/rate column from a single groupby"""
+    # Use 'Total' dataset as it contains aggregated Hub data
+    hubs = metric_rows(store, 'Total', '본부')
+    if hubs.empty: return pd.DataFrame()
+
+    summary = hubs.groupby(level="본부", sort=False).agg(**{
+        col: (metric, how) for col, (metric, how) in HUB_SUMMARY_COLUMNS.items()
+    })
+    order = [h for h in HUB_BRANCH_MAP if h in summary.index]
+    # Normalize rates if < 1 (Excel dec)
+    summary = percent_columns(summary.loc[order], ["정지율", "L정지율", "i정지율"])
+    return summary.rename_axis("본부").reset_index()
+
+# === Rollup Cube ===
+CUBE_KINDS = ("본부", "지사")
+
+@profiled()
+def build_rollup_cube(df_total, store):
+    """Hub/branch rollups over (데이터셋, 본부, 지사, 지표), built once per data version.
+
+    Returns a dict the views drill into by lookup instead of re-filtering/grouping df_total:
+      "orgs":        {(데이터셋, 구분): wide (본부, 지사) x 지표 rows of the store, rates in percent}
+      "hubs":        wide (데이터셋, 본부) x 지표 rollup of each hub's branches (sums; percent rates averaged)
+      "hub_summary": get_hub_summary(store)
+      "long":        {(데이터셋, 구분): df_total row positions in sheet order}
+      "positions":   {(데이터셋, 구분): {지사: df_total row positions in sheet order}}
+    Only positions are kept, so the long rows stay in df_total (memory-mapped from a snapshot) until
+    cube_long takes them.
+    """
+    rates = [m for m in RATE_METRICS if m in store.columns]
+    pct = percent_columns(store, rates)
+    datasets = pct.index.get_level_values("데이터셋").unique()
+    orgs = {(ds, kind): metric_rows(pct, ds, kind) for ds in datasets for kind in CUBE_KINDS}
+
+    branches = pct[pct.index.get_level_values("구분") == "지사"].droplevel("구분")
+    hubs = branches.groupby(level=["데이터셋", "본부"], observed=True, sort=True).agg(
+        {m: ("mean" if m in rates else "sum") for m in pct.columns}
+    )
+
+    long, positions = {}, {}
+    if df_total is not None and not df_total.empty:
+        # Hub rows carry the hub in 지사 too, so both kinds are keyed by 지사
+        for (ds, kind, org), idx in df_total.groupby(["데이터셋", "구분", "지사"], observed=True, sort=False).indices.items():
+            positions.setdefault((ds, kind), {})[org] = idx
+        long = {key: np.sort(np.concatenate(list(by_org.values()))) for key, by_org in positions.items()}
+    return {"orgs": orgs, "hubs": hubs, "hub_summary": get_hub_summary(store), "long": long, "positions": positions}
+
+def cube_orgs(cube, dataset, kind, hub=None, orgs=None):
+    """Percent-rate wide rows indexed by 지사: one hub's orgs (store order) or the listed orgs (지사 order)"""
+    rows = cube["orgs"].get((dataset, kind))
+    if rows is None: return pd.DataFrame(columns=TOTAL_METRICS, dtype=float)
+    if hub is not None:
+        try: rows = rows.loc[hub]
+        except KeyError: return rows.iloc[0:0].droplevel("본부")
+    else: rows = rows.droplevel("본부")
+    if orgs is not None: rows = rows[rows.index.isin(list(orgs))].sort_index()
+    return rows
+
+def cube_hub(cube, dataset, hub):
+    """Branch rollup (Series indexed by 지표) of one hub, or None"""
+    key = (dataset, hub)
+    return cube["hubs"].loc[key] if key in cube["hubs"].index else None
+
+def cube_long(cube, df_total, dataset, kind, orgs=None):
+    """Long (지사, 지표, 값) rows of one dataset/구분 taken from df_total in sheet order, optionally just the listed orgs"""
+    key = (dataset, kind)
+    if key not in cube["long"]: return pd.DataFrame(columns=["본부", "지사", "구분", "데이터셋", "지표", "값"])
+    if orgs is None: take = cube["long"][key]
+    else:
+        positions = cube["positions"][key]
+        hits = [positions[o] for o in orgs if o in positions]
+        take = np.sort(np.concatenate(hits)) if hits else np.array([], dtype=np.intp)
+    rows = df_total.take(take)
+    return rows.assign(지사=rows["본부"]) if kind == "본부" else rows
+
+# === Period Deltas ===
+@profiled()
+def build_period_deltas(df_periods):
+    """Period-over-period table over a load_periods() frame, computed once.
+
+    Returns {"value", "previous", "delta"}: wide (기준일, 데이터셋, 구분, 본부, 지사) x 지표 frames, where
+    'previous' is the same org's value at its preceding 기준일 and 'delta' = value - previous.
+    """
+    if df_periods is None or df_periods.empty:
+        empty = build_metric_store(None)
+        empty = pd.concat({pd.Timestamp(0): empty}, names=["기준일"]).iloc[0:0]
+        return {"value": empty, "previous": empty, "delta": empty}
+
+    value = pd.concat(
+        {period: build_metric_store(rows) for period, rows in df_periods.groupby("기준일", sort=True)},
+        names=["기준일"]
+    )
+    value = value.sort_index(level=STORE_INDEX + ["기준일"], sort_remaining=False)
+    previous = value.groupby(level=STORE_INDEX, observed=True, sort=False).shift(1)
+    return {"value": value.sort_index(), "previous": previous.sort_index(), "delta": (value - previous).sort_index()}
+
+def period_changes(deltas, dataset, org, period=None):
+    """지표 x (값, 이전값, 증감) for one hub/branch at 'period' (default: its latest 기준일), or None"""
+    kind = "본부" if org in HUB_BRANCH_MAP else "지사"
+    key = (dataset, kind, ORG_HUB_LOOKUP.get(org, org), org)
+    try: rows = deltas["value"].xs(key, level=STORE_INDEX)
+    except KeyError: return None
+    if rows.empty: return None
+    period = rows.index.max() if period is None else pd.Timestamp(period)
+    if period not in rows.index: return None
+    full_key = (period,) + key
+    return pd.DataFrame({
+        "값": deltas["value"].loc[full_key], "이전값": deltas["previous"].loc[full_key], "증감": deltas["delta"].loc[full_key]
+    })
@@ -3,8 +3,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import os
-import re
+from data_loader import (
+    DEFAULT_EXCEL_FILE, HUB_BRANCH_MAP, ALL_BRANCHES,
+    source_fingerprint, restore_float
+)
+from analytics import (
+    process_branch_bm_data, cube_orgs, cube_hub, cube_long,
+    trend_series, latest_mom
+)
+from pipeline import prepare_datasets
+from hot_reload import DatasetWatcher, WATCH_INTERVAL
+from profiling import TRACE_COLUMNS, start_trace, stage
 
 # === 1. Page & Style Configuration ===
 st.set_page_config(
@@ -246,204 +255,44 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # === 2. Settings & Constants ===
-DEFAULT_EXCEL_FILE = "data.xlsx"
-
-# Global Constants
-HUB_BRANCH_MAP = {
-    "강남/서부": ["강남", "서부", "강서", "송파", "충청", "대전", "전주/전북", "광주/전남", "제주"],
-    "강북/강원": ["중앙", "강북", "서대문", "고양", "의정부", "남양주", "강릉", "원주"],
-    "부산/경남": [],
-    "대구/경북": [],
-    "충남/충북": [],
-    "전남/전북": []
-}
-
-HUB_NAME_MAP = {
-    "강북강원": "강북/강원", "부산경남": "부산/경남", "전남전북": "전남/전북",
-    "충남충북": "충남/충북", "대구경북": "대구/경북", "강남서부": "강남/서부"
-}
-
-ALL_BRANCHES = [br for branches in HUB_BRANCH_MAP.values() for br in branches]
 
 PREFERRED_ORDER = ["강북강원", "강북/강원", "본부", "중앙", "강북", "서대문", "고양", "의정부", "남양주", "강릉", "원주"]
 COLORS = ['#3bc9db', '#ff6b6b', '#69db7c', '#ffd43b', '#da77f2', '#ff8787', '#22b8cf', '#ced4da']
+WORKBOOK_CACHE_ENTRIES = 4  # Recent workbook versions (uploads / data.xlsx revisions) kept in memory
+FIGURE_CACHE_ENTRIES = 64   # Per builder; least recently used figures are evicted first
 
 def sort_key(name):
     try: return PREFERRED_ORDER.index(name)
     except: return 999
 
 # === 3. Data Loading Functions ===
-
-def parse_date_robust(date_str):
-    """Parses dates like '25/10(e)', '25/11.04', '44800'(Excel) into '2025-10-01'"""
-    try:
-        s = str(date_str).strip()
-        # Handle Excel float dates (approx chk)
-        if s.replace('.','',1).isdigit() and 30000 < float(s) < 60000:
-            return pd.to_datetime(float(s), unit='D', origin='1899-12-30').strftime("%Y-%m-%d")
-            
-        # Regex: Start with 2 digits (Year), separator, 1-2 digits (Month)
-        match = re.match(r'^(\d{2})[/.](?:\s*)(\d{1,2})', s)
-        if match:
-            yy, mm = match.groups()
-            return f"20{yy}-{int(mm):02d}-01"
-        
-        # Try Std Pandas
-        dt = pd.to_datetime(s, errors='coerce')
-        if not pd.isna(dt):
-            return dt.strftime("%Y-%m-%d")
-            
-        return None
-    except: return None
-
-def load_data_from_source(source, sheet_keyword, file_keyword):
-    """Loads dataframe from Excel or CSV source"""
-    if source is None: return None
-    
-    # 1. Excel File
-    if hasattr(source, 'name') and source.name.endswith('.xlsx'):
-        try:
-            xls = pd.ExcelFile(source)
-            for sheet in xls.sheet_names:
-                if sheet_keyword in sheet:
-                    return pd.read_excel(source, sheet_name=sheet, header=None)
-        except: pass
-    
-    # 2. Local Excel Path
-    if isinstance(source, str) and source.endswith('.xlsx') and os.path.exists(source):
-         try:
-            xls = pd.ExcelFile(source)
-            for sheet in xls.sheet_names:
-                if sheet_keyword in sheet:
-                    return pd.read_excel(source, sheet_name=sheet, header=None)
-         except: pass
-    
-    # 3. Local CSV Search
-    for f in os.listdir('.'):
-        if file_keyword in f and f.endswith('.csv'):
-            return pd.read_csv(f, header=None)
-            
-    return None
-
-@st.cache_data
-def load_total_data():
+def get_data_source():
     uploaded = st.session_state.get('uploaded_file')
-    if uploaded: return load_data_from_source(uploaded, "시각화", "시각화")
-    return load_data_from_source("data.xlsx", "시각화", "시각화")
-
-@st.cache_data
-def load_rate_data(type_key):
-    uploaded = st.session_state.get('uploaded_file')
-    kw_sheet = "정지율" if type_key == "suspension" else "부실율"
-    kw_file = "기관정지율" if type_key == "suspension" else "기관부실율"
-    if uploaded: return load_data_from_source(uploaded, kw_sheet, kw_file)
-    return load_data_from_source("data.xlsx", kw_sheet, kw_file)
-
-def process_total_df(df):
-    if df is None: return None
-    try:
-        header_row = 3
-        # Robust Header Search
-        for i in range(min(50, len(df))):
-            val = str(df.iloc[i, 0]).strip()
-            if "구분" in val: 
-                header_row = i; break
-        
-        # Corrected Ranges based on file analysis
-        ranges = {"Total": (1, 13), "SP": (15, 27), "KPI": (28, 40)}
-        col_names = ["L형 건", "i형 건", "L+i형 건", "L형 정지율", "i형 정지율", "L+i형 정지율",
-                     "L형 월정료", "i형 월정료", "L+i형 월정료", "L형료 정지율", "i형료 정지율", "L+i형료 정지율"]
-        
-        parsed = []
-        for i in range(header_row + 1, len(df)):
-            row = df.iloc[i]
-            org = str(row[0]).strip()
-            if not org or org == 'nan': continue
-            
-            is_hub = org in HUB_BRANCH_MAP.keys()
-            is_br = False; hub_name = org
-            if is_hub: hub_name = org
-            else:
-                for h, brs in HUB_BRANCH_MAP.items():
-                    if org in brs: is_br = True; hub_name = h; break
-            if not (is_hub or is_br): continue
-            
-            for section, (start, end) in ranges.items():
-                try:
-                    vals = row[start:end].values
-                    for idx, val in enumerate(vals):
-                        try: num = float(str(val).replace(',', '').replace('-', '0'))
-                        except: num = 0.0
-                        parsed.append({
-                            "본부": hub_name, "지사": org, "구분": "본부" if is_hub else "지사",
-                            "데이터셋": section, "지표": col_names[idx], "값": num
-                        })
-                except: continue
-        return pd.DataFrame(parsed)
-    except: return None
-
-def process_rate_df(df):
-    if df is None: return None
-    try:
-        processed = []
-        # Robust Iteration
-        for i in range(0, df.shape[1], 2):
-            if i+1 >= df.shape[1]: break
-            br_name = str(df.iloc[0, i]).strip()
-            if pd.isna(br_name) or br_name == 'nan': continue
-            
-            # Application of Name Mapping for Consistency (e.g. 강북강원 -> 강북/강원)
-            if br_name in HUB_NAME_MAP:
-                br_name = HUB_NAME_MAP[br_name]
-            
-            sub = df.iloc[1:, [i, i+1]].copy()
-            sub.columns = ["d", "v"]
-            sub = sub.dropna(subset=['d']) # Drop only if date is missing
-            
-            hub_name = "기타"
-            real_name = HUB_NAME_MAP.get(br_name, br_name)
-            if real_name in HUB_BRANCH_MAP.keys(): hub_name = real_name
-            else:
-                for h, brs in HUB_BRANCH_MAP.items():
-                    if br_name in brs: hub_name = h; break
-            
-            for _, row in sub.iterrows():
-                date_val = parse_date_robust(row['d'])
-                if not date_val: continue
-                try: val = float(str(row['v']).replace(',', ''))
-                except: val = 0.0
-                processed.append({"날짜": date_val, "본부": hub_name, "지사": br_name, "비율": val * 100})
-        
-        res = pd.DataFrame(processed)
-        if not res.empty:
-            res['날짜'] = pd.to_datetime(res['날짜'])
-            res['월'] = res['날짜'].dt.strftime('%y년 %-m월')
-        return res
-    except: return None
+    return uploaded if uploaded else DEFAULT_EXCEL_FILE
+
+# Keyed on the workbook fingerprint; '_source' is excluded from Streamlit's argument hashing.
+# cache_resource hands every session the same (read-only) objects instead of a per-call copy. The long-format
+# frames view the memory-mapped snapshot / shared store files (other processes share their pages) and the cube
+# keeps only row positions into them; the metric store and trend indexes are small per-process tables.
+@st.cache_resource(max_entries=WORKBOOK_CACHE_ENTRIES, show_spinner=False)
+def load_datasets(fingerprint, _source):
+    """Processed long-format frames, built once per workbook version and shared across reruns/sessions"""
+    return prepare_datasets(_source)
+
+# One watcher per server process: data.xlsx replacements are built in the background and swapped in
+@st.cache_resource(show_spinner=False)
+def get_watcher():
+    return DatasetWatcher(DEFAULT_EXCEL_FILE, prepare_datasets, interval=WATCH_INTERVAL).start()
+
+def load_current_datasets(source):
+    """(data version, datasets): the watcher's ready-built data.xlsx, else a (cached) load of the source"""
+    if source == DEFAULT_EXCEL_FILE:
+        current = get_watcher().current()
+        if current is not None: return current
+    data_version = source_fingerprint(source)
+    return data_version, load_datasets(data_version, source)
 
 # === 4. Data Processing Logic (Helpers) ===
-def process_branch_bm_data(df_total, branch_name):
-    # Use 'Total' dataset to match Hub Summary values (e.g. Row 6 Cols E/F)
-    mask = (df_total['지사'] == branch_name) & (df_total['데이터셋'] == 'Total')
-    df = df_total[mask]
-    if df.empty: return None
-
-    def get_val(metric):
-        v = df[df['지표'] == metric]['값'].values
-        return v[0] if len(v) > 0 else 0.0
-
-    bm_data = [
-        {
-            "BM": "L형", "건수": get_val("L형 건"), "금액": get_val("L형 월정료"),
-            "정지율": get_val("L형 정지율") * 100 if get_val("L형 정지율") < 1 else get_val("L형 정지율")
-        },
-        {
-            "BM": "i형", "건수": get_val("i형 건"), "금액": get_val("i형 월정료"),
-            "정지율": get_val("i형 정지율") * 100 if get_val("i형 정지율") < 1 else get_val("i형 정지율")
-        }
-    ]
-    return pd.DataFrame(bm_data)
-
 def generate_text_insight(df_bm, df_trend_susp):
     insights = []
     top_vol = df_bm.sort_values('금액', ascending=False).iloc[0]
@@ -463,50 +312,243 @@ def generate_text_insight(df_bm, df_trend_susp):
     
     return "\n\n".join(insights)
 
-def get_hub_summary(df_total):
-    # Use 'Total' dataset as it contains aggregated Hub data
-    mask_hub = (df_total['데이터셋'] == 'Total') & (df_total['구분'] == '본부')
-    df = df_total[mask_hub]
-    summary = []
+# === 4.5. Figure Builders (cached) ===
+# Figures are keyed on (data_version, selection, theme_name); '_' arguments carry the data and are not hashed.
+# st.cache_resource hands back the same Figure object, so hits skip both the build and update_layout.
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_bm_bar_figure(data_version, branch, value_col, theme_name, _df_bm):
+    theme = THEMES[theme_name]
+    fig = px.bar(_df_bm, x='BM', y=value_col, color='BM', text_auto=',.0f', color_discrete_sequence=COLORS, template=theme['plotly_template'])
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        height=350, showlegend=False,
+        font=dict(family="Pretendard", color=theme['chart']['sub_text']),
+        yaxis=dict(showgrid=True, gridcolor=theme['chart']['grid'])
+    )
+    if value_col == '금액': fig.update_layout(yaxis_tickformat=',')
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_entity_trend_figure(data_version, entity, display_name, theme_name, _t_s, _t_f):
+    theme = THEMES[theme_name]
+    t_s, t_f = _t_s, _t_f
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    # Suspension Rate (Area + Line + Values)
+    if not t_s.empty:
+        fig.add_trace(go.Scatter(
+            x=t_s['날짜'], y=t_s['비율'], name="정지율",
+            mode='lines+markers+text',
+            text=[f"{v:.2f}%" for v in t_s['비율']],
+            textposition="top center", 
+            textfont=dict(size=10, color="#e9ecef"),
+            line=dict(color=COLORS[0], width=3, shape='spline'),
+            marker=dict(size=6, line=dict(width=1, color="#0E1117")),
+            fill='tozeroy', fillcolor=f"rgba{tuple(int(COLORS[0].lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + (0.1,)}"
+        ), secondary_y=False)
+
+    # Failure Rate (Dotted Line + Values)
+    if not t_f.empty:
+        fig.add_trace(go.Scatter(
+            x=t_f['날짜'], y=t_f['비율'], name="부실율",
+            mode='lines+markers+text',
+            text=[f"{v:.2f}%" for v in t_f['비율']],
+            textposition="bottom center",
+            textfont=dict(size=10, color=COLORS[1]),
+            line=dict(color=COLORS[1], width=2, dash='dot'),
+            marker=dict(size=5, symbol='diamond')
+        ), secondary_y=True)
+
+    fig.update_layout(
+        title=dict(text=f"<b>{display_name}</b>", font=dict(size=15, color=theme['chart']['text']), x=0, y=0.95),
+        template=theme['plotly_template'],
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        height=280, 
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="top", y=1.15, xanchor="right", x=1, font=dict(size=10, color=theme['chart']['sub_text'])),
+        margin=dict(l=10, r=10, t=40, b=40),
+        yaxis=dict(showticklabels=False, showgrid=True, gridcolor=theme['chart']['grid'])
+    )
+    
+    # Custom X-Axis Labels (e.g., '25.1, '25.2 ...)
+    all_dates = pd.concat([t_s['날짜'], t_f['날짜']]).unique()
+    all_dates = sorted(all_dates)
+    
+    if len(all_dates) > 0:
+        tick_vals = all_dates
+        tick_texts = []
+        
+        for d_str in all_dates:
+            try:
+                # d_str is 'YYYY-MM-DD'
+                y_str, m_str, _ = str(d_str).split('-')
+                y_short = y_str[2:]
+                m_int = int(m_str)
+                
+                # Requested Format: '25.1
+                lbl = f"'{y_short}.{m_int}"
+                tick_texts.append(lbl)
+            except:
+                tick_texts.append(d_str)
+
+        fig.update_xaxes(
+            tickmode='array',
+            tickvals=tick_vals,
+            ticktext=tick_texts,
+            showgrid=False,
+            showticklabels=True,
+            tickfont=dict(size=11, color=theme['chart']['sub_text'], weight="bold"),
+            automargin=True
+        )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_snapshot_figures(data_version, key, sel_hub, sel_brs, m_type, theme_name, _df_v, _df_org):
+    """Pie / bar / quadrant / risk-ranking figures of one snapshot tab ('quad'/'risk' None without rate data)"""
+    theme = THEMES[theme_name]
+    df_v, df_org = _df_v, _df_org
+    if key == "KPI":
+         if m_type == "건수": cols = ["L형 건"]; fmt = ",.0f"
+         else: cols = ["L형 월정료"]; fmt = ",.0f"
+    else:
+        if m_type == "건수": cols = ["L형 건", "i형 건", "L+i형 건"]; fmt = ",.0f"
+        else: cols = ["L형 월정료", "i형 월정료", "L+i형 월정료"]; fmt = ",.0f"
     
-def get_hub_summary(df_total):
-    # Use 'Total' dataset as it contains aggregated Hub data
-    mask_hub = (df_total['데이터셋'] == 'Total') & (df_total['구분'] == '본부')
-    df = df_total[mask_hub]
-    summary = []
+    df_c = df_v[df_v['지표'].isin(cols)].copy()
+    df_c['sort_idx'] = df_c['지사'].map(sort_key).astype(int)
+    df_c = df_c.sort_values(['sort_idx', '값'], ascending=[True, False])
+    figs = {"pie": None, "bar": None, "quad": None, "risk": None, "error": None}
     
-    for hub in HUB_BRANCH_MAP.keys():
-        d = df[df['본부'] == hub]
-        if d.empty: continue
-        try:
-            cnt_total = d[d['지표'] == 'L+i형 건']['값'].sum()
-            cnt_l = d[d['지표'] == 'L형 건']['값'].sum()
-            cnt_i = d[d['지표'] == 'i형 건']['값'].sum()
+    # --- 1. Pie Chart (Top Left) ---
+    df_pie = df_org[cols].dropna(how='all').sum(axis=1).rename('값').rename_axis('지사').reset_index()
+    fig_pie = px.pie(df_pie, values='값', names='지사', hole=0.4, color_discrete_sequence=COLORS)
+    fig_pie.update_traces(textinfo='percent+label', textfont_size=11)
+    fig_pie.update_layout(
+        title=dict(text=f"<b>지사별 {m_type} 비중</b>", font=dict(color=theme['chart']['text']), x=0.5),
+        template=theme['plotly_template'],
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        showlegend=False, margin=dict(t=40, b=10, l=10, r=10), height=350,
+        font=dict(family="Pretendard", color=theme['chart']['sub_text'])
+    )
+    figs["pie"] = fig_pie
+
+    # --- 2. Bar Chart (Top Right) ---
+    fig = px.bar(df_c, x='지사', y='값', color='지표', barmode='group', text_auto=fmt, 
+                    color_discrete_sequence=COLORS, template=theme['plotly_template'])
+    fig.update_layout(
+        title=dict(text=f"<b>지사별 {m_type} (절대값)</b>", font=dict(color=theme['chart']['text']), x=0.5),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        height=350, xaxis_title=None, 
+        font=dict(family="Pretendard", color=theme['chart']['sub_text']),
+        yaxis=dict(showgrid=True, gridcolor=theme['chart']['grid']),
+        margin=dict(t=40, b=10, l=10, r=10)
+    )
+    figs["bar"] = fig
+        
+    # Prepare Data for Row 2 (Rate-based)
+    df_quad = pd.DataFrame()
+    try:
+         # Identify prefix (L, i, L+i)
+         target_prefix = "L+i"
+         if "L형" in cols[0] and "L+i" not in cols[0]: target_prefix = "L"
+         elif "i형" in cols[0] and "L+i" not in cols[0]: target_prefix = "i"
+         rate_col = f"{target_prefix}형 정지율"
+         
+         # Get Rate Data (cube rates are already in percent)
+         rate_df = df_org[rate_col].dropna().rename('rate').rename_axis('지사').reset_index()
+         # Merge
+         df_quad = pd.merge(df_pie, rate_df, on='지사', how='inner')
+         
+         if not df_quad.empty:
+            # --- 3. Quadrant Chart (Bottom Left) ---
+            mean_x = df_quad['값'].mean()
+            mean_y = df_quad['rate'].mean()
             
-            amt = d[d['지표'] == 'L+i형 월정료']['값'].sum()
-            amt_l = d[d['지표'] == 'L형 월정료']['값'].sum()
-            amt_i = d[d['지표'] == 'i형 월정료']['값'].sum()
+            fig_quad = px.scatter(df_quad, x='값', y='rate', text='지사', color='지사', 
+                                color_discrete_sequence=COLORS)
+            fig_quad.update_traces(textposition='top center', marker=dict(size=12, line=dict(width=1, color='white')))
             
-            # Use Exact Matches to avoid mixing with 'Amount Rates' (Col M, etc.)
-            rate_total = d[d['지표'] == 'L+i형 정지율']['값'].mean()
-            rate_l = d[d['지표'] == 'L형 정지율']['값'].mean()
-            rate_i = d[d['지표'] == 'i형 정지율']['값'].mean()
+            fig_quad.add_hline(y=mean_y, line_width=1, line_dash="dash", line_color=theme['chart']['sub_text'])
+            fig_quad.add_vline(x=mean_x, line_width=1, line_dash="dash", line_color=theme['chart']['sub_text'])
             
-            # Normalize rates if < 1 (Excel dec)
-            if rate_total < 1: rate_total *= 100
-            if rate_l < 1: rate_l *= 100
-            if rate_i < 1: rate_i *= 100
-
-            summary.append({
-                "본부": hub, 
-                "총건수": cnt_total, "L건수": cnt_l, "i건수": cnt_i,
-                "총금액": amt, "L금액": amt_l, "i금액": amt_i, 
-                "정지율": rate_total, "L정지율": rate_l, "i정지율": rate_i
-            })
-        except: continue
-    return pd.DataFrame(summary)
+            fig_quad.update_layout(
+                title=dict(text=f"<b>사분면 분석 ({m_type} vs 정지율)</b>", font=dict(color=theme['chart']['text']), x=0.5),
+                template=theme['plotly_template'],
+                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                showlegend=False, height=350,
+                xaxis=dict(title=m_type, showgrid=True, gridcolor=theme['chart']['grid']),
+                yaxis=dict(title="정지율(%)", showgrid=True, gridcolor=theme['chart']['grid']),
+                font=dict(family="Pretendard", color=theme['chart']['sub_text']),
+                margin=dict(l=10, r=10, t=40, b=10)
+            )
+            figs["quad"] = fig_quad
+
+            # --- 4. Risk Ranking Chart (Bottom Right) ---
+            df_rank = df_quad.sort_values('rate', ascending=True) # Ascending for BarH (Top=Highest?) No barh plots bottom-up usually.
+            # We want Highest Risk at Top? Or Sorted?
+            # Let's simple Ascending sort so Highest is at top in plotly barh default? (Plotly plots Y bottom-to-top)
+            # Actually let's sort Descending (High Risk first)? 
+            # If we use y='지사', x='rate', and orient='h'.
+            
+            fig_risk = px.bar(df_rank, x='rate', y='지사', text='rate', orientation='h',
+                              color='rate', color_continuous_scale='Reds')
+            fig_risk.update_traces(texttemplate='%{x:.2f}%', textposition='inside')
+            fig_risk.update_layout(
+                title=dict(text=f"<b>지사별 정지율 랭킹 ({target_prefix}형 기준)</b>", font=dict(color=theme['chart']['text']), x=0.5),
+                template=theme['plotly_template'],
+                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                height=350, showlegend=False,
+                xaxis=dict(showgrid=True, gridcolor=theme['chart']['grid'], title="정지율(%)"),
+                yaxis=dict(title=None),
+                font=dict(family="Pretendard", color=theme['chart']['sub_text']),
+                margin=dict(l=10, r=10, t=40, b=10)
+            )
+            figs["risk"] = fig_risk
+                
+    except Exception as e: figs["error"] = f"Quad/Risk Error: {str(e)}"
+    return figs
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_trend_compare_figure(data_version, type_r, sel_brs, theme_name, _target_df):
+    theme = THEMES[theme_name]
+    df_v = _target_df[_target_df['지사'].isin(sel_brs)].copy()
+    df_v['비율'] = restore_float(df_v['비율'].to_numpy())
+    df_v['sort_idx'] = df_v['지사'].map(sort_key).astype(int)
+    df_v = df_v.sort_values(['sort_idx', '날짜'])
+    
+    fig = go.Figure()
+    for i, branch in enumerate(df_v['지사'].unique()):
+        d = df_v[df_v['지사'] == branch]
+        color = COLORS[i % len(COLORS)]
+        fig.add_trace(go.Scatter(
+            x=d['날짜'], y=d['비율'], mode='lines+markers', name=branch, 
+            line=dict(width=3, color=color, shape='spline'), 
+            marker=dict(size=8, color=color, line=dict(width=1, color='white')), 
+            hovertemplate=f"<b>{branch}</b><br>%{{x|%y.%m}}<br>{type_r}: %{{y:.2f}}%<extra></extra>"
+        ))
+        if not d.empty:
+            last_val = d.iloc[-1]
+            fig.add_annotation(
+                x=last_val['날짜'], y=last_val['비율'], text=f"{last_val['비율']:.2f}%", 
+                showarrow=False, yshift=10, 
+                font=dict(color=color, size=11, weight="bold"),
+                bgcolor="rgba(0,0,0,0.6)", borderpad=2, bordercolor=color
+            )
+    
+    fig.update_layout(
+        template=theme['plotly_template'],
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        hovermode="x unified", height=600, 
+        xaxis=dict(tickformat="%y.%m", showgrid=True, gridcolor=theme['chart']['grid']), 
+        yaxis=dict(ticksuffix="%", tickformat=".2f", showgrid=True, gridcolor=theme['chart']['grid']), 
+        font=dict(family="Pretendard", color=theme['chart']['sub_text']), 
+        margin=dict(r=20)
+    )
+    return fig
 
 # === 5. UI & Main Logic ===
+trace = start_trace()  # Per-rerun stage timings (admin profile panel)
 
 with st.sidebar:
     # Use column for better logo alignment if needed, or simple image
@@ -519,7 +561,8 @@ with st.sidebar:
     st.markdown("---")
     with st.expander("📂 데이터 파일 업로드 (관리자용)"):
         pwd = st.text_input("비밀번호 입력", type="password", key="admin_pwd")
-        if pwd == "3867":
+        is_admin = pwd == "3867"
+        if is_admin:
             uploaded_file = st.file_uploader("파일 선택 (Excel/CSV)", type=['xlsx', 'csv'])
             if uploaded_file: st.session_state['uploaded_file'] = uploaded_file
         elif pwd:
@@ -529,26 +572,26 @@ with st.sidebar:
     mode = st.radio("MENU", ["🔍 지사별 상세 분석", "📊 전체 현황 스냅샷", "📈 전체 추이 비교"])
 
 # Load & Process
-with st.spinner("데이터를 불러오는 중..."):
-    raw_total = load_total_data()
-    raw_susp = load_rate_data("suspension")
-    raw_fail = load_rate_data("failure")
-
-    df_total = process_total_df(raw_total)
-    # Ensure df_susp and df_fail are dataframes, even if empty
-    df_susp = process_rate_df(raw_susp)
-    if df_susp is None: df_susp = pd.DataFrame()
-    
-    df_fail = process_rate_df(raw_fail)
-    if df_fail is None: df_fail = pd.DataFrame()
+trace.label = mode
+with st.spinner("데이터를 불러오는 중..."), stage("load datasets"):
+    source = get_data_source()
+    data_version, datasets = load_current_datasets(source)
+    df_total, df_susp, df_fail = datasets["total"], datasets["suspension"], datasets["failure"]
+    metrics, cube = datasets["metrics"], datasets["cube"]
+    susp_trend, fail_trend = datasets["susp_trend"], datasets["fail_trend"]
+
+# Per-sheet load errors (reported by the parallel loader), shown before a failed 시각화 sheet stops the page
+for sheet_key, error in datasets.get("errors", {}).items():
+    st.warning(f"⚠️ '{sheet_key}' 데이터를 불러오지 못했습니다: {error}")
 
 if df_total is None:
     st.info("👋 데이터 파일을 업로드하거나 프로젝트 폴더에 'data.xlsx' 또는 'csv' 파일을 위치시켜 주세요.")
     st.stop()
 
 # --- TOP SECTION: Hub Status ---
+hub_stage = trace.begin("render: hub summary")
 with st.expander("🏢 본부별 운영 현황 요약", expanded=True):
-    hub_summ = get_hub_summary(df_total)
+    hub_summ = cube["hub_summary"]
     if not hub_summ.empty:
         cols = st.columns(len(hub_summ))
         for idx, row in hub_summ.iterrows():
@@ -595,41 +638,33 @@ with st.expander("🏢 본부별 운영 현황 요약", expanded=True):
     
     # Filter for Gangbuk/Gangwon branches
     target_hub = "강북/강원"
-    mask_br = (df_total['데이터셋'] == 'Total') & (df_total['구분'] == '지사') & (df_total['본부'] == target_hub)
-    df_br_summ = df_total[mask_br]
+    df_br_summ = cube_orgs(cube, 'Total', '지사', hub=target_hub)
     
     if not df_br_summ.empty:
         # Get unique branches in preferred order
-        br_list = [b for b in HUB_BRANCH_MAP[target_hub] if b in df_br_summ['지사'].unique()]
+        br_list = [b for b in HUB_BRANCH_MAP[target_hub] if b in df_br_summ.index]
         
         # Display in rows of 5 or all in one responsive wrap? 
         # Using columns matching the number of branches (max 8) might be tight, let's use columns(len)
         cols_br = st.columns(len(br_list))
         
         for idx, br in enumerate(br_list):
-            d = df_br_summ[df_br_summ['지사'] == br]
-            if d.empty: continue
+            d = df_br_summ.loc[br]
             try:
-                cnt = d[d['지표'] == 'L+i형 건']['값'].sum()
-                amt = d[d['지표'] == 'L+i형 월정료']['값'].sum()
-                # Exact match for rate
-                rate = d[d['지표'] == 'L+i형 정지율']['값'].mean()
-                if rate < 1: rate *= 100
+                cnt = d['L+i형 건']
+                amt = d['L+i형 월정료']
+                # Exact match for rate (already in percent)
+                rate = d['L+i형 정지율']
                 
-                # MoM Calculation (from df_susp)
+                # MoM Calculation (precomputed from df_susp)
                 mom_html = ""
-                if not df_susp.empty:
-                    tr = df_susp[df_susp['지사'] == br].sort_values('날짜')
-                    if len(tr) >= 2:
-                        curr = tr.iloc[-1]['비율']
-                        prev = tr.iloc[-2]['비율']
-                        diff = curr - prev
-                        
-                        # Symbol & Color
-                        symbol = "▲" if diff > 0 else "▼" if diff < 0 else "-"
-                        d_color = "#ff6b6b" if diff > 0 else "#339af0" if diff < 0 else "#adb5bd"
-                        
-                        mom_html = f"<span style='font-size:0.6em; color:{d_color}; margin-left:4px;'>({symbol}{abs(diff):.2f}%p)</span>"
+                diff = latest_mom(susp_trend, br)
+                if diff is not None:
+                    # Symbol & Color
+                    symbol = "▲" if diff > 0 else "▼" if diff < 0 else "-"
+                    d_color = "#ff6b6b" if diff > 0 else "#339af0" if diff < 0 else "#adb5bd"
+                    
+                    mom_html = f"<span style='font-size:0.6em; color:{d_color}; margin-left:4px;'>({symbol}{abs(diff):.2f}%p)</span>"
                 
                 with cols_br[idx % len(cols_br)]:
                     amt_unit = int(amt / 1000)
@@ -643,8 +678,10 @@ with st.expander("🏢 본부별 운영 현황 요약", expanded=True):
                     </div>
                     """, unsafe_allow_html=True)
             except: continue
+trace.end(hub_stage)
 
 # ----------------- 1. Branch Detail Analysis -----------------
+render_stage = trace.begin(f"render: {mode}")
 if "지사별 상세 분석" in mode:
     st.title("🔍 지사별 운영 현황 상세 분석")
     
@@ -674,27 +711,20 @@ if "지사별 상세 분석" in mode:
     # --- Hub Comparative Insight (Added Request) ---
     if sel_hub_detail != "전체":
         # 1. Prepare Data
-        mask_hub = (df_total['데이터셋'] == 'Total') & (df_total['구분'] == '지사') & (df_total['본부'] == sel_hub_detail)
-        df_h = df_total[mask_hub]
+        df_h = cube_orgs(cube, 'Total', '지사', hub=sel_hub_detail)
         
         if not df_h.empty:
-            summary_list = []
-            valid_branches = [b for b in HUB_BRANCH_MAP.get(sel_hub_detail, []) if b in df_h['지사'].unique()]
+            valid_branches = [b for b in HUB_BRANCH_MAP.get(sel_hub_detail, []) if b in df_h.index]
             
             # Extract Rate/Amt for each branch
-            stats = []
-            for br in valid_branches:
-                d = df_h[df_h['지사'] == br]
-                if d.empty: continue
-                try:
-                    r = d[d['지표'] == 'L+i형 정지율']['값'].mean()
-                    if r < 1: r *= 100
-                    amt = d[d['지표'] == 'L+i형 월정료']['값'].sum()
-                    stats.append({'br': br, 'rate': r, 'amt': amt})
-                except: continue
+            d = df_h.loc[valid_branches]
+            df_stats = pd.DataFrame({
+                'br': valid_branches,
+                'rate': d['L+i형 정지율'].to_numpy(),
+                'amt': d['L+i형 월정료'].to_numpy()
+            })
             
-            if stats:
-                df_stats = pd.DataFrame(stats)
+            if not df_stats.empty:
                 worst = df_stats.loc[df_stats['rate'].idxmax()]
                 best  = df_stats.loc[df_stats['rate'].idxmin()]
                 vol   = df_stats.loc[df_stats['amt'].idxmax()]
@@ -711,7 +741,7 @@ if "지사별 상세 분석" in mode:
                     <div style="border-left:1px solid #dee2e6; height:20px;"></div>
                     <div>💰 <b>최대 규모</b>: <b>{vol['br']}</b></div>
                     <div style="border-left:1px solid #dee2e6; height:20px;"></div>
-                    <div>📊 <b>평균 정지율</b>: {df_stats['rate'].mean():.2f}%</div>
+                    <div>📊 <b>평균 정지율</b>: {cube_hub(cube, 'Total', sel_hub_detail)['L+i형 정지율']:.2f}%</div>
                 </div>
                 """
                 
@@ -722,17 +752,9 @@ if "지사별 상세 분석" in mode:
                 </div>
                 """, unsafe_allow_html=True)
 
-    df_bm = process_branch_bm_data(df_total, target_branch)
+    df_bm = process_branch_bm_data(metrics, target_branch)
     
-    # Safe filtering
-    cols_req = ['지사', '날짜']
-    if not df_susp.empty and all(c in df_susp.columns for c in cols_req):
-        trend_s = df_susp[df_susp['지사'] == target_branch].sort_values('날짜')
-    else: trend_s = pd.DataFrame()
-
-    if not df_fail.empty and all(c in df_fail.columns for c in cols_req):
-        trend_f = df_fail[df_fail['지사'] == target_branch].sort_values('날짜')
-    else: trend_f = pd.DataFrame()
+    trend_s = trend_series(susp_trend, target_branch)
 
 
     if df_bm is None:
@@ -756,24 +778,11 @@ if "지사별 상세 분석" in mode:
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown("##### 📦 BM별 물량(건수) 비교")
-                fig_bar = px.bar(df_bm, x='BM', y='건수', color='BM', text_auto=',.0f', color_discrete_sequence=COLORS, template=cur_theme['plotly_template'])
-                fig_bar.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                    height=350, showlegend=False, 
-                    font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']),
-                    yaxis=dict(showgrid=True, gridcolor=cur_theme['chart']['grid'])
-                )
+                fig_bar = build_bm_bar_figure(data_version, target_branch, '건수', sel_theme, df_bm)
                 st.plotly_chart(fig_bar, use_container_width=True)
             with col2:
                 st.markdown("##### 💰 BM별 물량(금액) 비교")
-                fig_amt = px.bar(df_bm, x='BM', y='금액', color='BM', text_auto=',.0f', color_discrete_sequence=COLORS, template=cur_theme['plotly_template'])
-                fig_amt.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                    height=350, showlegend=False,
-                    font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']),
-                    yaxis=dict(showgrid=True, gridcolor=cur_theme['chart']['grid']),
-                    yaxis_tickformat=',' 
-                )
+                fig_amt = build_bm_bar_figure(data_version, target_branch, '금액', sel_theme, df_bm)
                 st.plotly_chart(fig_amt, use_container_width=True)
 
 
@@ -795,83 +804,15 @@ if "지사별 상세 분석" in mode:
                     # Display Name Logic
                     display_name = "강북강원" if entity == "강북/강원" else entity
                     
-                    # Fetch Data
-                    t_s = df_susp[df_susp['지사'] == entity].sort_values('날짜') if not df_susp.empty else pd.DataFrame()
-                    t_f = df_fail[df_fail['지사'] == entity].sort_values('날짜') if not df_fail.empty else pd.DataFrame()
+                    # Fetch Data (pre-sorted per branch)
+                    t_s = trend_series(susp_trend, entity)
+                    t_f = trend_series(fail_trend, entity)
                     
                     if t_s.empty and t_f.empty:
                         st.warning(f"{display_name}: 데이터 없음")
                         continue
                         
-                    fig = make_subplots(specs=[[{"secondary_y": True}]])
-                    
-                    # Suspension Rate (Area + Line + Values)
-                    if not t_s.empty:
-                        fig.add_trace(go.Scatter(
-                            x=t_s['날짜'], y=t_s['비율'], name="정지율",
-                            mode='lines+markers+text',
-                            text=[f"{v:.2f}%" for v in t_s['비율']],
-                            textposition="top center", 
-                            textfont=dict(size=10, color="#e9ecef"),
-                            line=dict(color=COLORS[0], width=3, shape='spline'),
-                            marker=dict(size=6, line=dict(width=1, color="#0E1117")),
-                            fill='tozeroy', fillcolor=f"rgba{tuple(int(COLORS[0].lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + (0.1,)}"
-                        ), secondary_y=False)
-
-                    # Failure Rate (Dotted Line + Values)
-                    if not t_f.empty:
-                        fig.add_trace(go.Scatter(
-                            x=t_f['날짜'], y=t_f['비율'], name="부실율",
-                            mode='lines+markers+text',
-                            text=[f"{v:.2f}%" for v in t_f['비율']],
-                            textposition="bottom center",
-                            textfont=dict(size=10, color=COLORS[1]),
-                            line=dict(color=COLORS[1], width=2, dash='dot'),
-                            marker=dict(size=5, symbol='diamond')
-                        ), secondary_y=True)
-
-                    fig.update_layout(
-                        title=dict(text=f"<b>{display_name}</b>", font=dict(size=15, color=cur_theme['chart']['text']), x=0, y=0.95),
-                        template=cur_theme['plotly_template'],
-                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                        height=280, 
-                        showlegend=True,
-                        legend=dict(orientation="h", yanchor="top", y=1.15, xanchor="right", x=1, font=dict(size=10, color=cur_theme['chart']['sub_text'])),
-                        margin=dict(l=10, r=10, t=40, b=40),
-                        yaxis=dict(showticklabels=False, showgrid=True, gridcolor=cur_theme['chart']['grid'])
-                    )
-                    
-                    # Custom X-Axis Labels (e.g., '25.1, '25.2 ...)
-                    all_dates = pd.concat([t_s['날짜'], t_f['날짜']]).unique()
-                    all_dates = sorted(all_dates)
-                    
-                    if len(all_dates) > 0:
-                        tick_vals = all_dates
-                        tick_texts = []
-                        
-                        for d_str in all_dates:
-                            try:
-                                # d_str is 'YYYY-MM-DD'
-                                y_str, m_str, _ = str(d_str).split('-')
-                                y_short = y_str[2:]
-                                m_int = int(m_str)
-                                
-                                # Requested Format: '25.1
-                                lbl = f"'{y_short}.{m_int}"
-                                tick_texts.append(lbl)
-                            except:
-                                tick_texts.append(d_str)
-
-                        fig.update_xaxes(
-                            tickmode='array',
-                            tickvals=tick_vals,
-                            ticktext=tick_texts,
-                            showgrid=False,
-                            showticklabels=True,
-                            tickfont=dict(size=11, color=cur_theme['chart']['sub_text'], weight="bold"),
-                            automargin=True
-                        )
-
+                    fig = build_entity_trend_figure(data_version, entity, display_name, sel_theme, t_s, t_f)
                     st.plotly_chart(fig, use_container_width=True)
 
 # ----------------- 2. Overall Snapshot -----------------
@@ -889,128 +830,39 @@ elif "전체 현황 스냅샷" in mode:
         if not default_sel: default_sel = sorted_branches[:5]
         sel_brs = st.multiselect("지사 필터", sorted_branches, default=default_sel)
     
-    t1, t2, t3 = st.tabs(["📌 Total", "⚡ SP 기준", "📉 KPI"])
+    # Tabs rerun on switch, so only the selected dataset's four figures are built and sent
+    snap_tabs = st.tabs(["📌 Total", "⚡ SP 기준", "📉 KPI"], key="snap_tab", on_change="rerun")
     def render_tab(key):
-        mask = df_total['데이터셋'] == key
+        # Drill into the precomputed cube: sheet-order long rows for the bars, per-org rollups for the rest
         if sel_hub != "전체" or sel_brs:
-            df_v = df_total[mask & (df_total['구분'] == '지사') & (df_total['지사'].isin(sel_brs))]
+            df_v = cube_long(cube, df_total, key, '지사', sel_brs)
+            df_org = cube_orgs(cube, key, '지사', orgs=sel_brs)
         else:
-            df_v = df_total[mask & (df_total['구분'] == '본부')]
-            df_v['지사'] = df_v['본부']
+            df_v = cube_long(cube, df_total, key, '본부')
+            df_org = cube_orgs(cube, key, '본부', orgs=HUB_BRANCH_MAP)
         if df_v.empty: st.info("데이터 없음"); return
         
-        m_type = st.radio("지표", ["건수", "금액"], key=f"snap_{key}", horizontal=True)
-        if key == "KPI":
-             if m_type == "건수": cols = ["L형 건"]; fmt = ",.0f"
-             else: cols = ["L형 월정료"]; fmt = ",.0f"
-        else:
-            if m_type == "건수": cols = ["L형 건", "i형 건", "L+i형 건"]; fmt = ",.0f"
-            else: cols = ["L형 월정료", "i형 월정료", "L+i형 월정료"]; fmt = ",.0f"
-        
-        df_c = df_v[df_v['지표'].isin(cols)].copy()
-        df_c['sort_idx'] = df_c['지사'].apply(sort_key)
-        df_c = df_c.sort_values(['sort_idx', '값'], ascending=[True, False])
+        # Closed tabs don't render their radio, so its choice is kept in a separate session key
+        m_options = ["건수", "금액"]
+        choice_key = f"snap_choice_{key}"
+        m_type = st.radio("지표", m_options, key=f"snap_{key}", horizontal=True,
+                          index=m_options.index(st.session_state.get(choice_key, m_options[0])),
+                          on_change=lambda: st.session_state.update({choice_key: st.session_state[f"snap_{key}"]}))
+        figs = build_snapshot_figures(data_version, key, sel_hub, tuple(sel_brs), m_type, sel_theme, df_v, df_org)
         
         # 2x2 Grid Layout
         r1_c1, r1_c2 = st.columns(2)
         r2_c1, r2_c2 = st.columns(2)
-        
-        # --- 1. Pie Chart (Top Left) ---
-        with r1_c1:
-            df_pie = df_c.groupby('지사')['값'].sum().reset_index()
-            fig_pie = px.pie(df_pie, values='값', names='지사', hole=0.4, color_discrete_sequence=COLORS)
-            fig_pie.update_traces(textinfo='percent+label', textfont_size=11)
-            fig_pie.update_layout(
-                title=dict(text=f"<b>지사별 {m_type} 비중</b>", font=dict(color=cur_theme['chart']['text']), x=0.5),
-                template=cur_theme['plotly_template'],
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                showlegend=False, margin=dict(t=40, b=10, l=10, r=10), height=350,
-                font=dict(family="Pretendard", color=cur_theme['chart']['sub_text'])
-            )
-            st.plotly_chart(fig_pie, use_container_width=True)
-
-        # --- 2. Bar Chart (Top Right) ---
-        with r1_c2:
-            fig = px.bar(df_c, x='지사', y='값', color='지표', barmode='group', text_auto=fmt, 
-                            color_discrete_sequence=COLORS, template=cur_theme['plotly_template'])
-            fig.update_layout(
-                title=dict(text=f"<b>지사별 {m_type} (절대값)</b>", font=dict(color=cur_theme['chart']['text']), x=0.5),
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                height=350, xaxis_title=None, 
-                font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']),
-                yaxis=dict(showgrid=True, gridcolor=cur_theme['chart']['grid']),
-                margin=dict(t=40, b=10, l=10, r=10)
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-        # Prepare Data for Row 2 (Rate-based)
-        df_quad = pd.DataFrame()
-        try:
-             # Identify prefix (L, i, L+i)
-             target_prefix = "L+i"
-             if "L형" in cols[0] and "L+i" not in cols[0]: target_prefix = "L"
-             elif "i형" in cols[0] and "L+i" not in cols[0]: target_prefix = "i"
-             rate_col = f"{target_prefix}형 정지율"
-             
-             # Get Rate Data
-             rate_df = df_v[df_v['지표'] == rate_col][['지사', '값']].rename(columns={'값': 'rate'})
-             if not rate_df.empty and rate_df['rate'].mean() < 1: rate_df['rate'] *= 100
-             # Merge
-             df_quad = pd.merge(df_pie, rate_df, on='지사', how='inner')
-             
-             if not df_quad.empty:
-                # --- 3. Quadrant Chart (Bottom Left) ---
-                with r2_c1:
-                     mean_x = df_quad['값'].mean()
-                     mean_y = df_quad['rate'].mean()
-                     
-                     fig_quad = px.scatter(df_quad, x='값', y='rate', text='지사', color='지사', 
-                                         color_discrete_sequence=COLORS)
-                     fig_quad.update_traces(textposition='top center', marker=dict(size=12, line=dict(width=1, color='white')))
-                     
-                     fig_quad.add_hline(y=mean_y, line_width=1, line_dash="dash", line_color=cur_theme['chart']['sub_text'])
-                     fig_quad.add_vline(x=mean_x, line_width=1, line_dash="dash", line_color=cur_theme['chart']['sub_text'])
-                     
-                     fig_quad.update_layout(
-                         title=dict(text=f"<b>사분면 분석 ({m_type} vs 정지율)</b>", font=dict(color=cur_theme['chart']['text']), x=0.5),
-                         template=cur_theme['plotly_template'],
-                         paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                         showlegend=False, height=350,
-                         xaxis=dict(title=m_type, showgrid=True, gridcolor=cur_theme['chart']['grid']),
-                         yaxis=dict(title="정지율(%)", showgrid=True, gridcolor=cur_theme['chart']['grid']),
-                         font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']),
-                         margin=dict(l=10, r=10, t=40, b=10)
-                     )
-                     st.plotly_chart(fig_quad, use_container_width=True)
-
-                # --- 4. Risk Ranking Chart (Bottom Right) ---
-                with r2_c2:
-                    df_rank = df_quad.sort_values('rate', ascending=True) # Ascending for BarH (Top=Highest?) No barh plots bottom-up usually.
-                    # We want Highest Risk at Top? Or Sorted?
-                    # Let's simple Ascending sort so Highest is at top in plotly barh default? (Plotly plots Y bottom-to-top)
-                    # Actually let's sort Descending (High Risk first)? 
-                    # If we use y='지사', x='rate', and orient='h'.
-                    
-                    fig_risk = px.bar(df_rank, x='rate', y='지사', text='rate', orientation='h',
-                                      color='rate', color_continuous_scale='Reds')
-                    fig_risk.update_traces(texttemplate='%{x:.2f}%', textposition='inside')
-                    fig_risk.update_layout(
-                        title=dict(text=f"<b>지사별 정지율 랭킹 ({target_prefix}형 기준)</b>", font=dict(color=cur_theme['chart']['text']), x=0.5),
-                        template=cur_theme['plotly_template'],
-                        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                        height=350, showlegend=False,
-                        xaxis=dict(showgrid=True, gridcolor=cur_theme['chart']['grid'], title="정지율(%)"),
-                        yaxis=dict(title=None),
-                        font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']),
-                        margin=dict(l=10, r=10, t=40, b=10)
-                    )
-                    st.plotly_chart(fig_risk, use_container_width=True)
-                    
-        except Exception as e: st.error(f"Quad/Risk Error: {str(e)}")
+        with r1_c1: st.plotly_chart(figs["pie"], use_container_width=True)
+        with r1_c2: st.plotly_chart(figs["bar"], use_container_width=True)
+        if figs["quad"] is not None:
+            with r2_c1: st.plotly_chart(figs["quad"], use_container_width=True)
+            with r2_c2: st.plotly_chart(figs["risk"], use_container_width=True)
+        if figs["error"]: st.error(figs["error"])
     
-    with t1: render_tab("Total")
-    with t2: render_tab("SP")
-    with t3: render_tab("KPI")
+    for tab, key in zip(snap_tabs, ["Total", "SP", "KPI"]):
+        if tab.open:
+            with tab: render_tab(key)
 
 # ----------------- 3. Overall Trend -----------------
 else:
@@ -1033,38 +885,16 @@ else:
     # Safe rendering
     if not target_df.empty:
         if sel_brs:
-            df_v = target_df[target_df['지사'].isin(sel_brs)].copy()
-            df_v['sort_idx'] = df_v['지사'].apply(sort_key)
-            df_v = df_v.sort_values(['sort_idx', '날짜'])
-            
-            fig = go.Figure()
-            for i, branch in enumerate(df_v['지사'].unique()):
-                d = df_v[df_v['지사'] == branch]
-                color = COLORS[i % len(COLORS)]
-                fig.add_trace(go.Scatter(
-                    x=d['날짜'], y=d['비율'], mode='lines+markers', name=branch, 
-                    line=dict(width=3, color=color, shape='spline'), 
-                    marker=dict(size=8, color=color, line=dict(width=1, color='white')), 
-                    hovertemplate=f"<b>{branch}</b><br>%{{x|%y.%m}}<br>{type_r}: %{{y:.2f}}%<extra></extra>"
-                ))
-                if not d.empty:
-                    last_val = d.iloc[-1]
-                    fig.add_annotation(
-                        x=last_val['날짜'], y=last_val['비율'], text=f"{last_val['비율']:.2f}%", 
-                        showarrow=False, yshift=10, 
-                        font=dict(color=color, size=11, weight="bold"),
-                        bgcolor="rgba(0,0,0,0.6)", borderpad=2, bordercolor=color
-                    )
-            
-            fig.update_layout(
-                template=cur_theme['plotly_template'],
-                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                hovermode="x unified", height=600, 
-                xaxis=dict(tickformat="%y.%m", showgrid=True, gridcolor=cur_theme['chart']['grid']), 
-                yaxis=dict(ticksuffix="%", tickformat=".2f", showgrid=True, gridcolor=cur_theme['chart']['grid']), 
-                font=dict(family="Pretendard", color=cur_theme['chart']['sub_text']), 
-                margin=dict(r=20)
-            )
+            fig = build_trend_compare_figure(data_version, type_r, tuple(sel_brs), sel_theme, target_df)
             st.plotly_chart(fig, use_container_width=True)
         else: st.info("비교할 지사를 선택해주세요.")
     else: st.warning(f"{type_r} 데이터가 없습니다.")
+trace.end(render_stage)
+
+# ----------------- Admin: Pipeline Profile -----------------
+if is_admin:
+    with st.sidebar.expander("⏱️ 파이프라인 프로파일 (관리자용)"):
+        df_trace = pd.DataFrame(trace.rows(), columns=TRACE_COLUMNS).sort_values("start_ms")
+        df_trace["stage"] = ["  " * d + s for d, s in zip(df_trace["depth"], df_trace["stage"])]
+        st.dataframe(df_trace.drop(columns="depth"), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Trace 내보내기 (JSON)", trace.to_chrome_trace(), file_name="dashboard_trace.json", mime="application/json")
@@ -0,0 +1,372 @@
+"""Pipeline benchmarks on synthetic workbooks, results kept in .bench/results.jsonl (run: python bench_pipeline.py --orgs 10000)"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from data_loader import (HUB_BRANCH_MAP, HUB_NAME_MAP, ORG_HUB_LOOKUP, ALL_BRANCHES, TOTAL_SECTIONS, SHEET_KEYWORDS,
+                         DATE_PARSER, RATE_HISTORY, load_data_from_source, ingest_workbook, process_total_df, process_rate_df, memory_report)
+from analytics import build_metric_store, get_hub_summary
+from profiling import start_trace
+
+RESULTS_FILE = os.path.join(".bench", "results.jsonl")
+N_HUBS, FANOUT = 6, 8  # Default synthetic org map: hubs x branches per hub
+
+# === Synthetic Org Map ===
+
+def synthetic_hub_map(n_hubs=N_HUBS, fanout=FANOUT):
+    """{hub: [branches]} with n_hubs generated hubs of 'fanout' branches each"""
+    return {f"본부{h:03d}": [f"지사{h:03d}-{b:02d}" for b in range(fanout)] for h in range(n_hubs)}
+
+@contextmanager
+def synthetic_orgs(n_hubs=N_HUBS, fanout=FANOUT):
+    """Swaps synthetic_hub_map() into HUB_BRANCH_MAP / ORG_HUB_LOOKUP / ALL_BRANCHES for the block.
+
+    The parsers and summaries read those objects at call time, so they are patched in place and
+    restored afterwards.
+    """
+    saved = dict(HUB_BRANCH_MAP), dict(ORG_HUB_LOOKUP), list(ALL_BRANCHES)
+    hub_map = synthetic_hub_map(n_hubs, fanout)
+    HUB_BRANCH_MAP.clear(); HUB_BRANCH_MAP.update(hub_map)
+    ORG_HUB_LOOKUP.clear(); ORG_HUB_LOOKUP.update({hub: hub for hub in hub_map})
+    ORG_HUB_LOOKUP.update({br: hub for hub, brs in hub_map.items() for br in brs})
+    ALL_BRANCHES[:] = [br for brs in hub_map.values() for br in brs]
+    try: yield hub_map
+    finally:
+        HUB_BRANCH_MAP.clear(); HUB_BRANCH_MAP.update(saved[0])
+        ORG_HUB_LOOKUP.clear(); ORG_HUB_LOOKUP.update(saved[1])
+        ALL_BRANCHES[:] = saved[2]
+
+def map_orgs():
+    """Every hub of HUB_BRANCH_MAP followed by its branches"""
+    return [org for hub, brs in HUB_BRANCH_MAP.items() for org in (hub, *brs)]
+
+# === Synthetic Sheets ===
+
+def make_total_sheet(n_orgs=10000, seed=0):
+    """Raw (header=None) frame shaped like the '시각화' sheet: title rows, '구분' header, 40 columns.
+
+    Org names are drawn from the hubs and branches of HUB_BRANCH_MAP (only known orgs survive
+    processing), plus a few totals/unknown rows that the parser has to skip.
+    """
+    rng = np.random.default_rng(seed)
+    n_cols = 40
+    names = map_orgs() + ["합계", "기타지사"]
+
+    rows = [[np.nan] * n_cols for _ in range(3)]
+    rows[0][1] = "총정지(10.31)"
+    header = ["구분"] + [f"col{c}" for c in range(1, n_cols)]
+    rows.append(header)
+
+    orgs = rng.choice(names, size=n_orgs)
+    body = rng.integers(0, 50000, size=(n_orgs, n_cols)).astype(object)
+    for start, end in TOTAL_SECTIONS.values():
+        # Rate columns (4-6, 10-12 of each block) hold 4-digit Excel decimals (0.0001-0.0200)
+        for off in (3, 4, 5, 9, 10, 11):
+            if start + off < end:
+                body[:, start + off] = rng.integers(1, 201, size=n_orgs) / 10000
+    # Sprinkle the text forms the real exports contain: '1,234', '-' and blanks
+    mask = rng.random((n_orgs, n_cols))
+    body[mask < 0.02] = "-"
+    comma = (mask >= 0.02) & (mask < 0.04)
+    body[comma] = [f"{int(v):,}" for v in rng.integers(1000, 99999, size=int(comma.sum()))]
+    body[(mask >= 0.04) & (mask < 0.05)] = np.nan
+    body[:, 0] = orgs
+    return pd.DataFrame(rows + body.tolist())
+
+def make_rate_sheet(n_branches=50, n_months=120, seed=0):
+    """Raw frame shaped like '기관정지율'/'기관부실율': row 0 = org names, then (date token, rate) pairs.
+
+    The n_branches columns are the first orgs of HUB_BRANCH_MAP (each hub, then its branches);
+    ValueError if the map has fewer.
+    """
+    rng = np.random.default_rng(seed)
+    known = map_orgs()
+    if n_branches > len(known): raise ValueError(f"{n_branches} rate columns but only {len(known)} orgs in HUB_BRANCH_MAP")
+    names = known[:n_branches]
+    months = pd.period_range("2016-01", periods=n_months, freq="M")
+    # Mix of the token forms seen in the exports: '25/09', '25/10(e)', '26.1.16'
+    tokens = [f"{p.year % 100:02d}/{p.month:02d}" if k % 3 == 0 else
+              f"{p.year % 100:02d}/{p.month}(e)" if k % 3 == 1 else
+              f"{p.year % 100:02d}.{p.month}.16" for k, p in enumerate(months)]
+
+    header = []
+    for name in names: header += [name, "정지율"]
+    rows = [header]
+    rates = (rng.integers(1, 201, size=(n_months, n_branches)) / 10000).tolist()
+    for m, token in enumerate(tokens):
+        row = []
+        for b in range(n_branches): row += [token, rates[m][b]]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def write_workbook(path, n_orgs=10000, n_branches=50, n_months=120, seed=0):
+    """Writes an .xlsx with the '시각화', '기관정지율' and '기관부실율' sheets at the given scale (orgs from HUB_BRANCH_MAP)"""
+    sheets = {"시각화": make_total_sheet(n_orgs, seed),
+              "기관정지율": make_rate_sheet(n_branches, n_months, seed),
+              "기관부실율": make_rate_sheet(n_branches, n_months, seed + 1)}
+    wb = Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in df.itertuples(index=False):
+            ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+    wb.save(path)
+    return path
+
+# === Reference (pre-vectorization) Implementations ===
+
+def parse_date_rowwise(date_str):
+    """Per-cell date parser used by the row-wise baseline"""
+    try:
+        s = str(date_str).strip()
+        if s.replace('.','',1).isdigit() and 30000 < float(s) < 60000:
+            return pd.to_datetime(float(s), unit='D', origin='1899-12-30').strftime("%Y-%m-%d")
+        match = re.match(r'^(\d{2})[/.](?:\s*)(\d{1,2})', s)
+        if match:
+            yy, mm = match.groups()
+            return f"20{yy}-{int(mm):02d}-01"
+        dt = pd.to_datetime(s, errors='coerce')
+        if not pd.isna(dt):
+            return dt.strftime("%Y-%m-%d")
+        return None
+    except: return None
+
+def process_total_df_rowwise(df):
+    """Row-by-row parser that process_total_df replaced; kept here as the benchmark baseline"""
+    if df is None: return None
+    try:
+        header_row = 3
+        for i in range(min(50, len(df))):
+            val = str(df.iloc[i, 0]).strip()
+            if "구분" in val:
+                header_row = i; break
+
+        ranges = {"Total": (1, 13), "SP": (15, 27), "KPI": (28, 40)}
+        col_names = ["L형 건", "i형 건", "L+i형 건", "L형 정지율", "i형 정지율", "L+i형 정지율",
+                     "L형 월정료", "i형 월정료", "L+i형 월정료", "L형료 정지율", "i형료 정지율", "L+i형료 정지율"]
+
+        parsed = []
+        for i in range(header_row + 1, len(df)):
+            row = df.iloc[i]
+            org = str(row[0]).strip()
+            if not org or org == 'nan': continue
+
+            is_hub = org in HUB_BRANCH_MAP.keys()
+            is_br = False; hub_name = org
+            if is_hub: hub_name = org
+            else:
+                for h, brs in HUB_BRANCH_MAP.items():
+                    if org in brs: is_br = True; hub_name = h; break
+            if not (is_hub or is_br): continue
+
+            for section, (start, end) in ranges.items():
+                try:
+                    vals = row[start:end].values
+                    for idx, val in enumerate(vals):
+                        try: num = float(str(val).replace(',', '').replace('-', '0'))
+                        except: num = 0.0
+                        parsed.append({
+                            "본부": hub_name, "지사": org, "구분": "본부" if is_hub else "지사",
+                            "데이터셋": section, "지표": col_names[idx], "값": num
+                        })
+                except: continue
+        return pd.DataFrame(parsed)
+    except: return None
+
+def process_rate_df_rowwise(df):
+    """Column-pair/iterrows parser that process_rate_df replaced; kept here as the benchmark baseline"""
+    if df is None: return None
+    try:
+        processed = []
+        for i in range(0, df.shape[1], 2):
+            if i+1 >= df.shape[1]: break
+            br_name = str(df.iloc[0, i]).strip()
+            if pd.isna(br_name) or br_name == 'nan': continue
+            if br_name in HUB_NAME_MAP:
+                br_name = HUB_NAME_MAP[br_name]
+
+            sub = df.iloc[1:, [i, i+1]].copy()
+            sub.columns = ["d", "v"]
+            sub = sub.dropna(subset=['d'])
+
+            hub_name = "기타"
+            real_name = HUB_NAME_MAP.get(br_name, br_name)
+            if real_name in HUB_BRANCH_MAP.keys(): hub_name = real_name
+            else:
+                for h, brs in HUB_BRANCH_MAP.items():
+                    if br_name in brs: hub_name = h; break
+
+            for _, row in sub.iterrows():
+                date_val = parse_date_rowwise(row['d'])
+                if not date_val: continue
+                try: val = float(str(row['v']).replace(',', ''))
+                except: val = 0.0
+                processed.append({"날짜": date_val, "본부": hub_name, "지사": br_name, "비율": val * 100})
+
+        res = pd.DataFrame(processed)
+        if not res.empty:
+            res['날짜'] = pd.to_datetime(res['날짜'])
+            res['월'] = res['날짜'].dt.strftime('%y년 %-m월')
+        return res
+    except: return None
+
+# === Runner ===
+
+def best_of(fn, arg, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def print_memory(name, df):
+    report = memory_report({name: df})
+    before, after = report['before'].sum(), report['after'].sum()
+    print(f"  memory     : {before / 2**20:9.2f} MiB plain -> {after / 2**20:.2f} MiB compact ({1 - after / before:.0%} saved)")
+
+def bench_process_total(n_orgs, repeat):
+    raw = make_total_sheet(n_orgs)
+    t_old, df_old = best_of(process_total_df_rowwise, raw, repeat)
+    t_new, df_new = best_of(process_total_df, raw, repeat)
+    pd.testing.assert_frame_equal(df_old.reset_index(drop=True), df_new.reset_index(drop=True), check_dtype=False, check_categorical=False)
+    print(f"process_total_df  orgs={n_orgs:,}  rows_out={len(df_new):,}")
+    print(f"  row-wise   : {t_old * 1000:9.1f} ms")
+    print(f"  vectorized : {t_new * 1000:9.1f} ms  ({t_old / t_new:.1f}x)")
+    print_memory("total", df_new)
+    return {"process_total_df (row-wise)": t_old * 1000, "process_total_df (vectorized)": t_new * 1000}
+
+def bench_process_rate(n_branches, n_months, repeat):
+    raw = make_rate_sheet(n_branches, n_months)
+    t_old, df_old = best_of(process_rate_df_rowwise, raw, repeat)
+    t_new, df_new = best_of(process_rate_df, raw, repeat)
+    pd.testing.assert_frame_equal(df_old.reset_index(drop=True), df_new.reset_index(drop=True), check_dtype=False, check_categorical=False)
+    print(f"process_rate_df   branches={n_branches:,} months={n_months:,}  rows_out={len(df_new):,}")
+    print(f"  row-wise   : {t_old * 1000:9.1f} ms")
+    print(f"  vectorized : {t_new * 1000:9.1f} ms  ({t_old / t_new:.1f}x)")
+    print_memory("rate", df_new)
+    return {"process_rate_df (row-wise)": t_old * 1000, "process_rate_df (vectorized)": t_new * 1000}
+
+def reset_caches():
+    """Drops the warm state (rate-sheet history, date-token memo) so every timed run parses from scratch"""
+    for history in RATE_HISTORY.values(): history.clear()
+    DATE_PARSER.clear()
+
+def cold_best_of(fn, *args, repeat=3):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        reset_caches()
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+def summarize_workbook(path):
+    """End-to-end path of a cold app start: single-pass ingest -> metric store -> hub summary"""
+    return get_hub_summary(build_metric_store(ingest_workbook(path)["total"]))
+
+def bench_workbook(path, repeat):
+    """Per-stage and end-to-end timings (ms) of the pipeline on one workbook"""
+    timings, raw = {}, {}
+    print(f"pipeline          workbook={path}  ({os.path.getsize(path) / 2**20:.1f} MiB)")
+    for key, (sheet_keyword, file_keyword) in SHEET_KEYWORDS.items():
+        timings[f"load_data_from_source[{key}]"], raw[key] = cold_best_of(load_data_from_source, path, sheet_keyword, file_keyword, repeat=repeat)
+    timings["process_total_df"], df_total = cold_best_of(process_total_df, raw["total"], repeat=repeat)
+    for key in ("suspension", "failure"):
+        timings[f"process_rate_df[{key}]"], _ = cold_best_of(process_rate_df, raw[key], repeat=repeat)
+    timings["build_metric_store"], store = cold_best_of(build_metric_store, df_total, repeat=repeat)
+    timings["get_hub_summary"], _ = cold_best_of(get_hub_summary, store, repeat=repeat)
+    timings["end-to-end (per-sheet loads)"] = sum(timings.values())
+    timings["end-to-end (ingest_workbook)"], _ = cold_best_of(summarize_workbook, path, repeat=repeat)
+    for name, ms in timings.items():
+        print(f"  {name:<34} {ms:9.1f} ms")
+
+    # Stage breakdown of one traced end-to-end run (the @profiled functions, nested by depth)
+    reset_caches()
+    trace = start_trace("bench")
+    summarize_workbook(path)
+    for rec in trace.rows():
+        print(f"    {'  ' * rec['depth']}{rec['stage']:<{32 - 2 * rec['depth']}} {rec['wall_ms']:9.1f} ms")
+    return timings
+
+# === Stored Results ===
+
+def git_revision():
+    """Short HEAD hash ('-dirty' with uncommitted changes to tracked files), None outside a git checkout"""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+    return rev + ("-dirty" if dirty else "")
+
+def load_results(path):
+    if not os.path.exists(path): return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_result(path, record):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def print_comparison(record, history):
+    """Stage-by-stage change against the latest stored run of the same scale from another revision"""
+    same_scale = [r for r in history if r["scale"] == record["scale"]]
+    previous = next((r for r in reversed(same_scale) if r["revision"] != record["revision"]), same_scale[-1] if same_scale else None)
+    if previous is None:
+        print("compare           no stored run at this scale yet")
+        return
+    print(f"compare           {previous['revision']} ({previous['timestamp']}) -> {record['revision']}")
+    for name, ms in record["timings"].items():
+        before = previous["timings"].get(name)
+        if before is None: continue
+        print(f"  {name:<34} {before:9.1f} -> {ms:9.1f} ms  ({ms / before - 1:+.0%})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orgs", type=int, default=10000, help="org rows in the synthetic 시각화 sheet")
+    parser.add_argument("--hubs", type=int, default=N_HUBS, help="hubs in the synthetic org map")
+    parser.add_argument("--fanout", type=int, default=FANOUT, help="branches per hub in the synthetic org map")
+    parser.add_argument("--branches", type=int, default=50, help="org column pairs in the synthetic rate sheet (at most hubs x (fanout + 1))")
+    parser.add_argument("--months", type=int, default=120, help="monthly rows in the synthetic rate sheet")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing repeats")
+    parser.add_argument("--workbook", help="benchmark this workbook end to end instead of a generated one")
+    parser.add_argument("--results", default=RESULTS_FILE, help=f"JSON-lines results store (default {RESULTS_FILE})")
+    parser.add_argument("--no-save", action="store_true", help="compare against stored results without appending this run")
+    args = parser.parse_args()
+    if args.hubs < 1 or args.fanout < 0: parser.error("--hubs must be >= 1 and --fanout >= 0")
+    if args.branches > args.hubs * (args.fanout + 1):
+        parser.error(f"--branches {args.branches} exceeds the {args.hubs * (args.fanout + 1)} orgs of --hubs {args.hubs} x --fanout {args.fanout}")
+
+    timings = {}
+    scale = {"orgs": args.orgs, "hubs": args.hubs, "fanout": args.fanout, "branches": args.branches, "months": args.months}
+    with synthetic_orgs(args.hubs, args.fanout):
+        timings.update(bench_process_total(args.orgs, args.repeat))
+        timings.update(bench_process_rate(args.branches, args.months, args.repeat))
+        if not args.workbook:
+            with tempfile.TemporaryDirectory() as tmp:
+                timings.update(bench_workbook(write_workbook(os.path.join(tmp, "bench.xlsx"), args.orgs, args.branches, args.months), args.repeat))
+    if args.workbook:
+        # A real workbook is processed against the real org map
+        timings.update(bench_workbook(args.workbook, args.repeat))
+        scale["workbook"] = os.path.basename(args.workbook)
+
+    record = {"revision": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "scale": scale,
+              "python": platform.python_version(), "pandas": pd.__version__, "timings": timings}
+    print_comparison(record, load_results(args.results))
+    if not args.no_save:
+        save_result(args.results, record)
+        print(f"saved             {args.results}")
+
+if __name__ == "__main__":
+    main()
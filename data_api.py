@@ -0,0 +1,203 @@
+"""Headless JSON / Python API over the processed datasets (run: python data_api.py --port 8502)"""
+import argparse
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import pandas as pd
+
+from data_loader import DEFAULT_EXCEL_FILE, HUB_BRANCH_MAP, source_fingerprint
+from analytics import metric_rows, process_branch_bm_data, trend_series, build_period_deltas, period_changes
+from pipeline import prepare_datasets
+from period_loader import load_periods, workbook_paths
+from hot_reload import DatasetWatcher, WATCH_INTERVAL
+
+DEFAULT_PORT = 8502
+PAGE_LIMIT, MAX_PAGE_LIMIT = 500, 5000
+RATE_DATASETS = {"suspension": "susp_trend", "failure": "fail_trend"}
+
+def paginate(df, offset=0, limit=PAGE_LIMIT):
+    """One page of a frame as {"total", "offset", "limit", "items": [records]}"""
+    offset, limit = int(offset), int(limit)
+    if offset < 0 or not 0 < limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f"offset must be >= 0 and limit in 1..{MAX_PAGE_LIMIT}")
+    page = df.iloc[offset:offset + limit]
+    return {"total": len(df), "offset": offset, "limit": limit,
+            "items": json.loads(page.to_json(orient="records", date_format="iso", force_ascii=False))}
+
+def check_hub(hub):
+    """LookupError (404) for a hub outside HUB_BRANCH_MAP; None means all hubs"""
+    if hub is not None and hub not in HUB_BRANCH_MAP: raise LookupError(f"unknown hub: {hub}")
+
+class DataService:
+    """Python API: query methods return DataFrames of 'datasets' (default: the current workbook version)"""
+
+    def __init__(self, source=DEFAULT_EXCEL_FILE, interval=WATCH_INTERVAL, periods=None, year=None):
+        self.source = source
+        self.periods = periods or os.path.dirname(os.path.abspath(source))  # Workbooks with dated 시각화(MMDD) sheets
+        self.year = year  # Reporting year for period workbooks without a 20YY in their file name
+        self._watcher = DatasetWatcher(source, prepare_datasets, interval)
+        self._fallback = None  # (version, datasets) when the workbook is missing (CSV exports)
+        self._deltas = None  # (workbook fingerprints + year + data date, period_deltas output)
+        self._lock, self._periods_lock = threading.Lock(), threading.Lock()
+
+    def start(self, watch=True):
+        """Builds the current version; with watch=True keeps polling the workbook in the background"""
+        if watch: self._watcher.start()
+        else: self._watcher.refresh()
+        return self
+
+    def stop(self):
+        self._watcher.stop()
+
+    def current(self):
+        """(data version, datasets)"""
+        current = self._watcher.current()
+        if current is not None: return current
+        with self._lock:
+            version = source_fingerprint(self.source)
+            if self._fallback is None or self._fallback[0] != version:
+                self._fallback = (version, prepare_datasets(self.source))
+            return self._fallback
+
+    def _datasets(self, datasets):
+        return self.current()[1] if datasets is None else datasets
+
+    def hub_summary(self, datasets=None):
+        return self._datasets(datasets)["cube"]["hub_summary"]
+
+    def branches(self, hub=None, datasets=None):
+        """본부 / 지사 / 구분 of every org in the Total dataset, optionally for one hub"""
+        check_hub(hub)
+        store = self._datasets(datasets)["metrics"]
+        frames = [metric_rows(store, "Total", kind).index.to_frame(index=False).assign(구분=kind) for kind in ("본부", "지사")]
+        df = pd.concat(frames, ignore_index=True).astype(str).drop_duplicates()
+        if hub is not None: df = df[df["본부"] == hub]
+        return df.reset_index(drop=True)
+
+    def branch_bm(self, branch, datasets=None):
+        """L형/i형 건수, 금액, 정지율 of one hub/branch"""
+        df = process_branch_bm_data(self._datasets(datasets)["metrics"], branch)
+        if df is None: raise LookupError(f"unknown branch: {branch}")
+        return df
+
+    def data_as_of(self, datasets=None):
+        """Latest month of the served rate data (None without any): dates the source's own 시각화(MMDD) sheets"""
+        datasets = self._datasets(datasets)
+        latest = [df["날짜"].max() for df in (datasets["suspension"], datasets["failure"]) if not df.empty]
+        return max(latest) if latest else None
+
+    def period_deltas(self, year=None):
+        """build_period_deltas over the period workbooks plus 'errors' ({path[: sheet]: message} of skipped ones).
+
+        Rebuilt only when a workbook, the year or the served data's date changes. Workbooks without a 20YY
+        in their name take 'year'; the served workbook falls back to data_as_of().
+        """
+        year = year or self.year
+        paths = workbook_paths(self.periods)
+        as_of = {self.source: self.data_as_of()}
+        key = (tuple(source_fingerprint(p) for p in paths), year, as_of[self.source])
+        with self._periods_lock:
+            if self._deltas is None or self._deltas[0] != key:
+                errors = {}
+                deltas = build_period_deltas(load_periods(paths, year, errors, as_of))
+                self._deltas = (key, {**deltas, "errors": errors})
+            return self._deltas[1]
+
+    def period_changes(self, branch, dataset="Total", period=None, year=None, deltas=None):
+        """지표 / 값 / 이전값 / 증감 of one hub/branch at 'period' (default: its latest 기준일)"""
+        df = period_changes(self.period_deltas(year) if deltas is None else deltas, dataset, branch, period)
+        if df is None: raise LookupError(f"no period data for {branch} ({dataset}, {period or 'latest'})")
+        return df.rename_axis("지표").reset_index()
+
+    def rate_series(self, dataset, hub=None, branch=None, start=None, end=None, datasets=None):
+        """Monthly rate rows (날짜, 본부, 지사, 비율, 월, 이전비율, MoM) sorted by 지사, 날짜"""
+        if dataset not in RATE_DATASETS: raise LookupError(f"unknown rate dataset: {dataset}")
+        check_hub(hub)
+        trend = self._datasets(datasets)[RATE_DATASETS[dataset]]
+        if branch is not None:
+            if branch not in trend["bounds"]: raise LookupError(f"unknown branch: {branch}")
+            df = trend_series(trend, branch)
+        else: df = trend["frame"]
+        if hub is not None: df = df[df["본부"] == hub]
+        if start is not None: df = df[df["날짜"] >= pd.Timestamp(start)]
+        if end is not None: df = df[df["날짜"] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+# === HTTP/JSON Service ===
+# GET /health, /hubs, /branches?hub=, /bm?branch=, /rates/<suspension|failure>?hub=&branch=&start=&end=,
+#     /periods?branch=&dataset=&period=&year=
+# List responses: {version, total, offset, limit, items}, paged with ?offset=&limit=
+# /periods also carries 'errors': {workbook[: sheet]: message} for period workbooks it had to skip
+
+class ApiHandler(BaseHTTPRequestHandler):
+    service = None  # DataService, set by serve()
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        page = {k: query.pop(k) for k in ("offset", "limit") if k in query}
+        try: self._send(200, self.route(parts, query, page))
+        except LookupError as e: self._send(404, {"error": str(e)})
+        except (ValueError, TypeError) as e: self._send(400, {"error": str(e)})
+
+    def route(self, parts, query, page):
+        service = self.service
+        version, datasets = service.current()  # One snapshot per request: a hot swap can't mix versions
+        if parts == ["health"]:
+            return {"version": version, "source": service.source, "errors": datasets.get("errors") or {},
+                    "rows": {k: len(datasets[k]) for k in ("total", "suspension", "failure") if datasets.get(k) is not None}}
+        if parts == ["hubs"]: df = service.hub_summary(datasets)
+        elif parts == ["branches"]: df = service.branches(query.get("hub"), datasets)
+        elif parts == ["bm"]:  # Org names contain '/', so they travel as a query parameter
+            if not query.get("branch"): raise ValueError("missing ?branch=")
+            df = service.branch_bm(query["branch"], datasets)
+        elif parts == ["periods"]:
+            if not query.get("branch"): raise ValueError("missing ?branch=")
+            deltas = service.period_deltas(int(query["year"]) if query.get("year") else None)
+            df = service.period_changes(query["branch"], query.get("dataset") or "Total", query.get("period"), deltas=deltas)
+            return {"version": version, "errors": deltas["errors"], **paginate(df, **page)}
+        elif len(parts) == 2 and parts[0] == "rates":
+            df = service.rate_series(parts[1], **{k: query.get(k) for k in ("hub", "branch", "start", "end")}, datasets=datasets)
+        else: raise LookupError(f"no such endpoint: /{'/'.join(parts)}")
+        return {"version": version, **paginate(df, **page)}
+
+    def log_message(self, format, *args):
+        pass  # Quiet by default; consumers poll frequently
+
+def serve(source=DEFAULT_EXCEL_FILE, host="127.0.0.1", port=DEFAULT_PORT, interval=WATCH_INTERVAL, periods=None, year=None):
+    """Loads the datasets once, then serves them until interrupted"""
+    ApiHandler.service = DataService(source, interval, periods, year).start()
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    print(f"serving {source} on http://{host}:{server.server_port}")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally:
+        server.server_close()
+        ApiHandler.service.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=DEFAULT_EXCEL_FILE, help="workbook to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="seconds between workbook polls")
+    parser.add_argument("--periods", nargs="+", help="period workbooks or directories for /periods (default: the source's directory)")
+    parser.add_argument("--year", type=int, help="reporting year of period workbooks without a 20YY in their name")
+    args = parser.parse_args()
+    if not os.path.exists(args.source): print(f"{args.source} not found: serving the CSV exports")
+    serve(args.source, args.host, args.port, args.interval, args.periods, args.year)
+
+if __name__ == "__main__":
+    main()
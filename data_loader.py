@@ -0,0 +1,650 @@
+"""Workbook ingestion & parsing for the KTT Branch Operation Dashboard"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from profiling import profiled, tag_stage
+
+# === Settings & Constants ===
+DEFAULT_EXCEL_FILE = "data.xlsx"
+PIPELINE_VERSION = 3  # Bump whenever a parser/processing change alters the processed frames (invalidates snapshots)
+
+HUB_BRANCH_MAP = {
+    "강남/서부": ["강남", "서부", "강서", "송파", "충청", "대전", "전주/전북", "광주/전남", "제주"],
+    "강북/강원": ["중앙", "강북", "서대문", "고양", "의정부", "남양주", "강릉", "원주"],
+    "부산/경남": [],
+    "대구/경북": [],
+    "충남/충북": [],
+    "전남/전북": []
+}
+
+HUB_NAME_MAP = {
+    "강북강원": "강북/강원", "부산경남": "부산/경남", "전남전북": "전남/전북",
+    "충남충북": "충남/충북", "대구경북": "대구/경북", "강남서부": "강남/서부"
+}
+
+ALL_BRANCHES = [br for branches in HUB_BRANCH_MAP.values() for br in branches]
+
+# Org name -> hub name (hubs map to themselves; a branch listed twice keeps its first hub)
+ORG_HUB_LOOKUP = {hub: hub for hub in HUB_BRANCH_MAP}
+for _hub, _branches in HUB_BRANCH_MAP.items():
+    for _br in _branches: ORG_HUB_LOOKUP.setdefault(_br, _hub)
+
+# 시각화 sheet layout: dataset -> (start col, end col), 12 metric columns each
+TOTAL_SECTIONS = {"Total": (1, 13), "SP": (15, 27), "KPI": (28, 40)}
+TOTAL_METRICS = ["L형 건", "i형 건", "L+i형 건", "L형 정지율", "i형 정지율", "L+i형 정지율",
+                 "L형 월정료", "i형 월정료", "L+i형 월정료", "L형료 정지율", "i형료 정지율", "L+i형료 정지율"]
+
+# Dataset key -> (sheet keyword, CSV file keyword)
+SHEET_KEYWORDS = {
+    "total": ("시각화", "시각화"),
+    "suspension": ("정지율", "기관정지율"),
+    "failure": ("부실율", "기관부실율"),
+}
+
+# === Data Loading Functions ===
+
+class DateTokenParser:
+    """Normalizes raw date tokens ('25/10(e)', '25/11.04', '44800'(Excel)) into 'YYYY-MM-DD' strings.
+
+    The same tokens repeat across every branch column of the rate sheets, so results are kept in a
+    bounded LRU memo (token -> date); hits/misses are counted for diagnostics.
+    """
+    # Checked in order; first pattern that applies wins
+    SERIAL = re.compile(r'\d+\.?\d*|\.\d+')              # Excel serial day number (fullmatch)
+    YEAR_MONTH = re.compile(r'(\d{2})[/.](?:\s*)(\d{1,2})')  # 'YY/MM...' or 'YY.MM...' prefix (match)
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, value):
+        token = str(value).strip()
+        with self._lock:
+            if token in self._memo:
+                self._memo.move_to_end(token)
+                self.hits += 1
+                return self._memo[token]
+            self.misses += 1
+        result = self._parse_token(token)
+        with self._lock:
+            self._memo[token] = result
+            if len(self._memo) > self.max_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def _parse_token(self, s):
+        try:
+            # Handle Excel float dates (approx chk)
+            if self.SERIAL.fullmatch(s) and 30000 < float(s) < 60000:
+                return pd.to_datetime(float(s), unit='D', origin='1899-12-30').strftime("%Y-%m-%d")
+
+            # Start with 2 digits (Year), separator, 1-2 digits (Month)
+            match = self.YEAR_MONTH.match(s)
+            if match:
+                yy, mm = match.groups()
+                return f"20{yy}-{int(mm):02d}-01" if 1 <= int(mm) <= 12 else None
+
+            # Try Std Pandas
+            dt = pd.to_datetime(s, errors='coerce')
+            if not pd.isna(dt):
+                return dt.strftime("%Y-%m-%d")
+            return None
+        except Exception: return None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memo),
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            self.hits = self.misses = 0
+
+DATE_PARSER = DateTokenParser()
+
+def parse_date_robust(date_str):
+    """Parses dates like '25/10(e)', '25/11.04', '44800'(Excel) into '2025-10-01'"""
+    return DATE_PARSER.parse(date_str)
+
+def content_hash(source):
+    """sha256 hex digest of an uploaded file's bytes or a local file's contents"""
+    if hasattr(source, 'getvalue'):
+        return hashlib.sha256(source.getvalue()).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''): digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(source):
+    """Cache key for a workbook version: content hash for uploads, path + mtime + size for local files.
+
+    Without the workbook the data comes from CSV exports, so the key carries their versions instead.
+    """
+    if source is None: return None
+    if hasattr(source, 'getvalue'):
+        return "sha256:" + content_hash(source)
+    if isinstance(source, str) and os.path.exists(source):
+        stat = os.stat(source)
+        return f"{os.path.abspath(source)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return f"missing:{source}|{csv_fingerprint()}"
+
+def _is_xlsx(source):
+    is_upload = hasattr(source, 'name') and source.name.endswith('.xlsx')
+    is_path = isinstance(source, str) and source.endswith('.xlsx') and os.path.exists(source)
+    return is_upload or is_path
+
+def _open_excel(source):
+    """Returns an open pd.ExcelFile for an uploaded .xlsx or a local .xlsx path, else None"""
+    if source is None or not _is_xlsx(source): return None
+    try:
+        if hasattr(source, 'seek'): source.seek(0)
+        return pd.ExcelFile(source)
+    except Exception: return None
+
+def _load_workbook(source):
+    """Read-only openpyxl workbook (cached values, not formulas); raises if the file can't be read"""
+    if hasattr(source, 'seek'): source.seek(0)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True, keep_links=False)
+
+def _open_workbook(source):
+    """_load_workbook for an uploaded/local .xlsx, else (or if unreadable) None"""
+    if source is None or not _is_xlsx(source): return None
+    try: return _load_workbook(source)
+    except Exception: return None
+
+def _find_sheet(sheet_names, sheet_keyword):
+    return next((s for s in sheet_names if sheet_keyword in s), None)
+
+def _parse_sheets(wb, keys):
+    """{dataset key: raw sheet} for the given SHEET_KEYWORDS keys, parsed from an open workbook"""
+    frames = {}
+    xls = pd.ExcelFile(wb, engine="openpyxl")
+    for key in keys:
+        sheet = _find_sheet(wb.sheetnames, SHEET_KEYWORDS[key][0])
+        if sheet is None: continue
+        try: frames[key] = xls.parse(sheet, header=None)
+        except Exception: pass
+    return frames
+
+def _csv_fallback(frames):
+    for key, frame in frames.items():
+        if frame is None: frames[key] = _find_csv(SHEET_KEYWORDS[key][1])
+    return frames
+
+@profiled()
+def ingest_workbook(source):
+    """Single-pass ingestion: opens the workbook once and streams the wide 시각화 sheet straight into df_total.
+
+    Every keyword sheet comes from the same open workbook, so the XLSX is unzipped and its shared
+    strings/styles are read only once. Only the rate sheets are materialized as raw frames; if the
+    시각화 sheet is missing or cannot be streamed it is read and processed the regular way. Datasets
+    without a sheet come from local CSV exports through load_csv_dataset (chunked for large rate exports).
+    """
+    frames, total = {}, None
+    wb = _open_workbook(source)
+    if wb is not None:
+        try:
+            sheet = _find_sheet(wb.sheetnames, SHEET_KEYWORDS["total"][0])
+            total = None if sheet is None else stream_total_df(wb[sheet])
+            frames = _parse_sheets(wb, [k for k in SHEET_KEYWORDS if k != "total" or total is None])
+        finally: wb.close()
+
+    datasets = build_datasets(frames)
+    if total is not None: datasets["total"] = total
+    for key in SHEET_KEYWORDS:
+        if key in frames or (key == "total" and total is not None): continue
+        df = load_csv_dataset(key)
+        if df is not None: datasets[key] = df
+    return datasets
+
+def load_data_from_source(source, sheet_keyword, file_keyword):
+    """Loads a single dataframe from Excel or CSV source"""
+    xls = _open_excel(source)
+    if xls is not None:
+        with xls:
+            sheet = _find_sheet(xls.sheet_names, sheet_keyword)
+            if sheet is not None:
+                try: return xls.parse(sheet, header=None)
+                except Exception: pass
+    return _find_csv(file_keyword)
+
+def _find_header_row(df, default=3):
+    """First row (within the top 50) whose first cell contains '구분'"""
+    col0 = df.iloc[:50, 0].astype(str).str.strip()
+    hits = np.flatnonzero(col0.str.contains("구분", regex=False).to_numpy(dtype=bool))
+    return int(hits[0]) if len(hits) else default
+
+def _clean_number_block(block):
+    """Whole-block numeric cleaning of a raw sheet block into a float matrix.
+
+    Plain numbers are read directly; only cells that fail that (text such as '1,234' or '-') or are
+    negative take the text path str(v) -> drop ',' -> '-' as '0', with unparseable text becoming 0.0.
+    """
+    cells = pd.Series(block.to_numpy(dtype=object).ravel(), dtype=object)
+    num = pd.to_numeric(cells, errors='coerce').astype(float)
+    redo = (num.isna() & cells.notna()) | (num < 0)
+    if redo.any():
+        text = cells[redo].astype(str).str.replace(',', '', regex=False).str.replace('-', '0', regex=False)
+        num[redo] = pd.to_numeric(text, errors='coerce').fillna(0.0)
+    return num.to_numpy(dtype=float, na_value=np.nan).reshape(block.shape)
+
+# === Compact Dtypes ===
+# Dimension columns are categorical with lexically sorted categories, so sorting/grouping orders match plain strings
+TOTAL_DIMENSIONS = ["본부", "지사", "구분", "데이터셋", "지표"]
+RATE_DIMENSIONS = ["본부", "지사", "월"]
+
+def _take_labels(labels, positions):
+    """Repeats a short label array by position as a Categorical (codes only, no per-row strings)"""
+    codes, categories = pd.factorize(np.asarray(labels, dtype=object), sort=True)
+    return pd.Categorical.from_codes(codes[positions], categories=pd.Index(categories, dtype="str"))
+
+FLOAT32_DIGITS = 6   # Significant decimal digits float32 always round-trips
+# Largest change accepted for float32 storage: a tenth of the 2-decimal display's half-step (0.005).
+# Decimal rates (0.0084) are displayed x100 as percent, so the same margin is 100 times smaller for them.
+FLOAT32_ATOL = 5e-4
+FLOAT32_RATE_ATOL = 5e-6
+
+def restore_float(values):
+    """float32 -> float64 rounded back to FLOAT32_DIGITS significant digits (the decimal it was stored from); others as-is"""
+    values = np.asarray(values)
+    if values.dtype != np.float32: return values
+    wide = values.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(wide)))
+    scale = 10.0 ** (FLOAT32_DIGITS - 1 - np.where(np.isfinite(magnitude), magnitude, 0))
+    return np.round(wide * scale) / scale
+
+def downcast_float(values, atol=FLOAT32_ATOL):
+    """float64 -> float32 when restore_float gives every value back within 'atol' (scalar or per value; NaN included), else as-is.
+
+    Counts/amounts up to 6 digits and rates/percentages below 1000 qualify; larger amounts keep the column float64.
+    """
+    values = np.asarray(values, dtype=float)
+    small = values.astype(np.float32)
+    return small if np.isclose(restore_float(small), values, rtol=0, atol=atol, equal_nan=True).all() else values
+
+def _concat_values(arrays):
+    """np.concatenate that keeps float32 only if every part is float32 (mixed parts are restored, then re-downcast)"""
+    if len({a.dtype for a in arrays}) > 1 and all(a.dtype.kind == "f" for a in arrays):
+        # Which values are decimal rates isn't known here, so every value gets the rate tolerance
+        return downcast_float(np.concatenate([restore_float(a) for a in arrays]), FLOAT32_RATE_ATOL)
+    return np.concatenate(arrays)
+
+def expand_frame(df):
+    """Inverse of the compact layout (categorical -> str, float32 -> float64), i.e. the plain pre-compaction frame"""
+    out = df.copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype): out[col] = out[col].astype("str")
+        elif out[col].dtype == np.float32: out[col] = restore_float(out[col].to_numpy())
+    return out
+
+def concat_compact(frames, dimensions):
+    """pd.concat for compact frames: dimension categoricals are unioned (sorted categories) instead of decaying to str"""
+    return pd.DataFrame({
+        col: (union_categoricals([df[col] for df in frames], sort_categories=True) if col in dimensions
+              else _concat_values([df[col].to_numpy() for df in frames]))
+        for col in frames[0].columns
+    })
+
+def memory_report(frames):
+    """Deep memory usage per column of {name: frame}, plain layout ('before') vs compact layout ('after'), in bytes"""
+    rows = []
+    for name, df in frames.items():
+        if df is None or df.empty: continue
+        before, after = expand_frame(df).memory_usage(deep=True, index=False), df.memory_usage(deep=True, index=False)
+        for col in df.columns:
+            rows.append({"frame": name, "column": col, "dtype": str(df[col].dtype), "before": int(before[col]), "after": int(after[col])})
+    report = pd.DataFrame(rows, columns=["frame", "column", "dtype", "before", "after"])
+    report["saved %"] = (1 - report["after"] / report["before"].where(report["before"] > 0)).mul(100).round(1)
+    return report
+
+def _total_layout(width):
+    """(sheet columns, datasets, metrics) of the Total/SP/KPI blocks, clipped to the sheet width"""
+    col_idx, sections, metrics = [], [], []
+    for section, (start, end) in TOTAL_SECTIONS.items():
+        for idx, col in enumerate(range(start, min(end, width))):
+            col_idx.append(col); sections.append(section); metrics.append(TOTAL_METRICS[idx])
+    return col_idx, sections, metrics
+
+def _value_atol(metrics):
+    """Per-metric float32 tolerance of the 값 column: 정지율 metrics are decimal rates"""
+    return np.where(["정지율" in m for m in metrics], FLOAT32_RATE_ATOL, FLOAT32_ATOL)
+
+def _melt_total(orgs, hub_names, values, sections, metrics):
+    """Row-major melt of the kept org rows: one row per (org, section, metric), same order as the sheet"""
+    kinds = np.where(np.isin(orgs, list(HUB_BRANCH_MAP.keys())), "본부", "지사")
+    org_pos = np.repeat(np.arange(len(orgs)), len(sections))
+    cell_pos = np.tile(np.arange(len(sections)), len(orgs))
+    return pd.DataFrame({
+        "본부": _take_labels(hub_names, org_pos), "지사": _take_labels(orgs, org_pos),
+        "구분": _take_labels(kinds, org_pos),
+        "데이터셋": _take_labels(sections, cell_pos), "지표": _take_labels(metrics, cell_pos),
+        "값": downcast_float(values.ravel(), np.tile(_value_atol(metrics), len(orgs)))
+    })
+
+@profiled()
+def process_total_df(df):
+    if df is None: return None
+    try:
+        header_row = _find_header_row(df)
+        body = df.iloc[header_row + 1:]
+
+        # Classify every org in one lookup (hub rows map to themselves, branch rows to their hub)
+        orgs = body.iloc[:, 0].astype(str).str.strip()
+        hub_names = orgs.map(ORG_HUB_LOOKUP)
+        keep = hub_names.notna().to_numpy(dtype=bool)
+        orgs, hub_names = orgs[keep].to_numpy(dtype=object), hub_names[keep].to_numpy(dtype=object)
+
+        col_idx, sections, metrics = _total_layout(df.shape[1])
+        values = _clean_number_block(body.iloc[keep, col_idx])
+        return _melt_total(orgs, hub_names, values, sections, metrics)
+    except: return None
+
+EXCEL_ERRORS = frozenset(ERROR_CODES)
+
+@profiled()
+def stream_total_df(ws, header_scan=50, default_header=3):
+    """process_total_df straight from a read-only openpyxl worksheet, without building the raw sheet frame.
+
+    Rows stream by once over columns 0-39 only; the first rows are buffered just until the '구분' header
+    is found (same rule as _find_header_row), and only rows whose org is a known hub/branch are kept.
+    """
+    if ws is None: return None
+    try:
+        n_cols = max(end for _, end in TOTAL_SECTIONS.values())
+        orgs, hub_names, kept = [], [], []
+        head, header_row, width = [], None, 0
+
+        def keep_row(values):
+            if values[0] is None: return
+            org = str(values[0]).strip()
+            hub = ORG_HUB_LOOKUP.get(org)
+            if hub is not None: orgs.append(org); hub_names.append(hub); kept.append(values)
+
+        for i, cells in enumerate(ws.iter_rows(max_col=n_cols, values_only=True)):
+            # Error values (#DIV/0! ...) read as blanks, like pd.read_excel
+            values = [None if v in EXCEL_ERRORS else v for v in cells]
+            values += [None] * (n_cols - len(values))
+            used = [j for j, v in enumerate(values) if v is not None]
+            if used: width = max(width, used[-1] + 1)
+
+            if header_row is None and i < header_scan:
+                head.append(values)
+                if values[0] is not None and "구분" in str(values[0]).strip(): header_row = i
+                continue
+            if header_row is None:
+                header_row = default_header
+                for row in head[default_header + 1:]: keep_row(row)
+            keep_row(values)
+        if header_row is None:
+            for row in head[default_header + 1:]: keep_row(row)
+
+        col_idx, sections, metrics = _total_layout(width)
+        block = np.array(kept, dtype=object).reshape(len(kept), n_cols)[:, col_idx]
+        values = _clean_number_block(pd.DataFrame(block))
+        return _melt_total(np.array(orgs, dtype=object), np.array(hub_names, dtype=object), values, sections, metrics)
+    except: return None
+
+def parse_dates_bulk(values):
+    """parse_date_robust over a Series of raw date cells -> datetime64 Series (NaT if unparseable).
+
+    Each distinct token is resolved once through DATE_PARSER and broadcast back by position.
+    """
+    codes, tokens = pd.factorize(values.astype(str).str.strip())
+    parsed = pd.to_datetime(pd.Series([DATE_PARSER.parse(t) for t in tokens], dtype=object)).astype('datetime64[us]')
+    out = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[us]')
+    found = codes >= 0
+    out[found] = parsed.to_numpy()[codes[found]]
+    return pd.Series(out, index=values.index)
+
+def _clean_rate_values(values):
+    """Rate cells -> float; text such as '0.0084' or '1,234' is read without commas, unparseable text is 0.0"""
+    num = pd.to_numeric(values, errors='coerce').astype(float)
+    redo = num.isna() & values.notna()
+    if redo.any():
+        text = values[redo].astype(str).str.replace(',', '', regex=False)
+        num[redo] = pd.to_numeric(text, errors='coerce').fillna(0.0)
+    return num
+
+def _rate_records(df):
+    """process_rate_df body; rows also carry '_pair', the position of their (date, rate) column pair"""
+    if df is None: return None
+    try:
+        # One object matrix up front: column-wise slicing of the wide (2 x branches) sheet is the slow part
+        cells = df.to_numpy(dtype=object)
+        # Branch name heads every (date, rate) column pair in row 0
+        pair_cols = np.arange(0, df.shape[1] - 1, 2)
+        names = pd.Series(cells[0, pair_cols], dtype=object).astype(str).str.strip()
+        valid = (names.notna() & (names != 'nan')).to_numpy(dtype=bool)
+        pair_cols = pair_cols[valid]
+        # Application of Name Mapping for Consistency (e.g. 강북강원 -> 강북/강원)
+        br_names = [HUB_NAME_MAP.get(n, n) for n in names[valid]]
+        hub_names = [ORG_HUB_LOOKUP.get(n, "기타") for n in br_names]
+
+        # Stack every pair into one long frame (pair-major, so rows keep the sheet's per-branch order)
+        body = cells[1:]
+        n_rows = len(body)
+        long = pd.DataFrame({
+            "d": body[:, pair_cols].T.ravel(),
+            "v": body[:, pair_cols + 1].T.ravel(),
+            "pair": np.repeat(np.arange(len(pair_cols)), n_rows)
+        })
+        long = long[long['d'].notna()] # Drop only if date is missing
+
+        dates = parse_dates_bulk(long['d'])
+        long, dates = long[dates.notna()], dates[dates.notna()]
+
+        pair = long['pair'].to_numpy()
+        # '25년 9월' labels are formatted once per distinct date and broadcast as categorical codes
+        date_codes, uniq_dates = pd.factorize(dates.to_numpy())
+        uniq_dates = pd.DatetimeIndex(uniq_dates)
+        months = [f"{d.year % 100:02d}년 {d.month}월" for d in uniq_dates]
+        return pd.DataFrame({
+            "날짜": dates.to_numpy(),
+            "본부": _take_labels(hub_names, pair), "지사": _take_labels(br_names, pair),
+            "비율": downcast_float(_clean_rate_values(long['v']).to_numpy() * 100),  # Percent already: FLOAT32_ATOL as-is
+            "월": _take_labels(months, date_codes),
+            "_pair": pair
+        })
+    except: return None
+
+@profiled()
+def process_rate_df(df):
+    res = _rate_records(df)
+    return None if res is None else res.drop(columns="_pair")
+
+# === CSV Exports ===
+CSV_CHUNK_BYTES = 32 * 2**20  # Rate exports above this are read and processed in row chunks
+CSV_CHUNK_ROWS = 20000
+
+class CsvIndex:
+    """Cached *.csv listing per directory, re-scanned only when the directory's mtime changes"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs = {}  # abs dir -> (mtime_ns, [csv names], {keyword: path or None})
+
+    def _entry(self, directory):
+        path = os.path.abspath(directory)
+        try: mtime = os.stat(path).st_mtime_ns
+        except OSError: return None
+        with self._lock:
+            entry = self._dirs.get(path)
+            if entry is not None and entry[0] == mtime: return entry
+        entry = (mtime, [f for f in os.listdir(path) if f.endswith('.csv')], {})
+        with self._lock: self._dirs[path] = entry
+        return entry
+
+    def find(self, file_keyword, directory='.'):
+        """First *.csv (directory listing order) whose name contains the keyword, or None"""
+        entry = self._entry(directory)
+        if entry is None: return None
+        _, names, by_keyword = entry
+        if file_keyword not in by_keyword:
+            name = next((f for f in names if file_keyword in f), None)
+            by_keyword[file_keyword] = None if name is None else os.path.join(directory, name)
+        return by_keyword[file_keyword]
+
+    def clear(self):
+        with self._lock: self._dirs.clear()
+
+CSV_INDEX = CsvIndex()
+
+def csv_fingerprint():
+    """path:mtime_ns:size of each CSV export CSV_INDEX resolves (overwriting a file doesn't touch the dir mtime)"""
+    parts = []
+    for _, file_keyword in SHEET_KEYWORDS.values():
+        path = CSV_INDEX.find(file_keyword)
+        if path is None: continue
+        try: stat = os.stat(path)
+        except OSError: continue
+        parts.append(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return ";".join(parts)
+
+def read_csv_raw(path, **kwargs):
+    """Raw header=None frame of a CSV export with every cell as text (the layouts mix names, tokens and numbers).
+
+    The multi-threaded pyarrow parser is tried first; ragged exports it rejects go through the C parser.
+    """
+    try: return pd.read_csv(path, header=None, dtype=str, engine="pyarrow", **kwargs)
+    except Exception: return pd.read_csv(path, header=None, dtype=str, **kwargs)
+
+# Export schemas: columns read as float64 (the rest stay text); rate exports are (date token, rate) column pairs
+TOTAL_NUMBER_COLUMNS = frozenset(c for start, end in TOTAL_SECTIONS.values() for c in range(start, end))
+
+def _csv_dtypes(n_cols, total=False):
+    """{column: dtype} of a 시각화 (total=True) or rate export body, 'n_cols' wide"""
+    numeric = (lambda c: c in TOTAL_NUMBER_COLUMNS) if total else (lambda c: c % 2 == 1)
+    return {c: "float64" if numeric(c) else str for c in range(n_cols)}
+
+def read_csv_typed(path, dtype, **kwargs):
+    """header=None frame read with declared column dtypes, or None when a cell doesn't fit (e.g. '-' in a number column).
+
+    pyarrow first; the C parser also reads quoted '1,234' numbers (thousands=',').
+    """
+    try: return pd.read_csv(path, header=None, dtype=dtype, engine="pyarrow", **kwargs)
+    except Exception: pass
+    try: return pd.read_csv(path, header=None, dtype=dtype, thousands=",", **kwargs)
+    except ValueError: return None
+
+def read_dataset_csv(key, path):
+    """Raw frame of a dataset export: the header rows as text, the body with _csv_dtypes (all text if it doesn't fit)"""
+    head = read_csv_raw(path, nrows=1 if key != "total" else 50)
+    # Body rows start after the '구분' header of the 시각화 export, after the branch-name row of a rate export
+    n_head = _find_header_row(head) + 1 if key == "total" else 1
+    # Width from the header rows, so a short first body row can't truncate the schema
+    n_cols = head.shape[1]
+    body = read_csv_typed(path, _csv_dtypes(n_cols, key == "total"), skiprows=n_head, names=range(n_cols))
+    if body is None: return read_csv_raw(path)
+    return pd.concat([head.iloc[:n_head], body], ignore_index=True)
+
+def _rate_csv_parts(path, header, chunksize, dtype, **kwargs):
+    parts = []
+    n_cols = header.shape[1]
+    with pd.read_csv(path, header=None, dtype=dtype, skiprows=1, names=range(n_cols), chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            records = _rate_records(pd.concat([header, chunk], ignore_index=True))
+            if records is None: return None
+            parts.append(records)
+    return parts
+
+def process_rate_csv(path, chunksize=CSV_CHUNK_ROWS):
+    """process_rate_df over a rate export read in row chunks, so the raw frame is never held whole.
+
+    Chunks are read with the _csv_dtypes schema, as wide as the header row; an export with text in a rate
+    column ('-') is re-read as text.
+    """
+    header = pd.read_csv(path, header=None, dtype=str, nrows=1)
+    try: parts = _rate_csv_parts(path, header, chunksize, _csv_dtypes(header.shape[1]), thousands=",")
+    except ValueError: parts = _rate_csv_parts(path, header, chunksize, str)
+    if parts is None: return None
+    if not parts: return process_rate_df(header)
+    merged = concat_compact(parts, RATE_DIMENSIONS) if len(parts) > 1 else parts[0]
+    # Chunks split every branch's rows; a stable sort on the pair restores pair-major sheet order
+    return merged.sort_values("_pair", kind="stable", ignore_index=True).drop(columns="_pair")
+
+def _find_csv(file_keyword):
+    """Local CSV search (first *.csv in cwd whose name contains the keyword), read as a raw frame"""
+    path = CSV_INDEX.find(file_keyword)
+    return None if path is None else read_csv_raw(path)
+
+@profiled()
+def load_csv_dataset(key):
+    """Processed frame of one dataset from its local CSV export, or None; large rate exports are chunked"""
+    path = CSV_INDEX.find(SHEET_KEYWORDS[key][1])
+    if path is None: return None
+    if key == "total": return process_total_df(read_dataset_csv(key, path))
+    if os.path.getsize(path) > CSV_CHUNK_BYTES: return process_rate_csv(path)
+    return process_rate_df(read_dataset_csv(key, path))
+
+# === Incremental Rate Ingestion ===
+def _append_rate_records(old, new):
+    """Concatenates two _rate_records frames back into pair-major sheet order"""
+    return concat_compact([old, new], RATE_DIMENSIONS).sort_values("_pair", kind="stable", ignore_index=True)
+
+class RateHistory:
+    """Processed history of one rate sheet, extended in place when a new workbook only appends month rows.
+
+    update() compares raw rows with the previous sheet (DataFrame.equals): an identical sheet reuses the
+    processed frame, an unchanged header and row prefix parses only the appended rows, and anything else
+    (edited/removed rows, new branch columns) falls back to a full rebuild.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._header, self._rows, self._records = None, None, None
+        self.last_mode = None
+
+    @profiled()
+    def update(self, df):
+        """process_rate_df(df), reusing the rows already processed from earlier versions of the sheet"""
+        if df is None or df.empty: return process_rate_df(df)
+        header = tuple(df.iloc[0].astype(str))
+        rows = df.iloc[1:]
+        with self._lock:
+            n_old = 0 if self._rows is None else len(self._rows)
+            same_prefix = (self._records is not None and header == self._header and len(rows) >= n_old
+                           and rows.iloc[:n_old].reset_index(drop=True).equals(self._rows))
+            if same_prefix and len(rows) == n_old:
+                records, mode = self._records, "unchanged"
+            elif same_prefix:
+                new = _rate_records(df.iloc[[0, *range(1 + n_old, len(df))]])
+                records, mode = (None, "full") if new is None else (_append_rate_records(self._records, new), "append")
+            else:
+                records, mode = None, "full"
+            if records is None: records = _rate_records(df)
+
+            kept = (header, rows.reset_index(drop=True), records) if records is not None else (None, None, None)
+            self._header, self._rows, self._records = kept
+            self.last_mode = mode
+        tag_stage(mode)  # Shows in the trace as 'RateHistory.update [append]' etc.
+        return None if records is None else records.drop(columns="_pair")
+
+    def clear(self):
+        with self._lock:
+            self._header, self._rows, self._records, self.last_mode = None, None, None, None
+
+RATE_HISTORY = {"suspension": RateHistory(), "failure": RateHistory()}
+
+def build_datasets(raw):
+    """Processes raw sheets ({dataset key: header=None frame}) into the long-format frames {'total', 'suspension', 'failure'}"""
+    # No raw 시각화 sheet (e.g. streamed by ingest_workbook): no process_total_df call, so no empty trace stage
+    df_total = None if raw.get("total") is None else process_total_df(raw["total"])
+    # Ensure df_susp and df_fail are dataframes, even if empty
+    df_susp = RATE_HISTORY["suspension"].update(raw.get("suspension"))
+    if df_susp is None: df_susp = pd.DataFrame()
+
+    df_fail = RATE_HISTORY["failure"].update(raw.get("failure"))
+    if df_fail is None: df_fail = pd.DataFrame()
+    return {"total": df_total, "suspension": df_susp, "failure": df_fail}
@@ -0,0 +1,78 @@
+"""Background watcher that rebuilds data.xlsx off the request path and swaps it in atomically"""
+import threading
+import time
+
+from data_loader import content_hash, source_fingerprint
+from profiling import start_trace
+
+WATCH_INTERVAL = 30.0  # seconds between polls
+
+def build_failure(datasets):
+    """Why a build is unusable (no 시각화 data or failed sheets), or None for a good build"""
+    errors = datasets.get("errors")
+    if errors: return "; ".join(f"{k}: {e}" for k, e in errors.items())
+    if datasets.get("total") is None: return "no 시각화 data (workbook unreadable or sheet missing)"
+    return None
+
+class DatasetWatcher:
+    """Keeps build(path) of the latest workbook version ready; current() -> (version, datasets) or None"""
+
+    def __init__(self, path, build, interval=WATCH_INTERVAL):
+        self.path, self.interval = path, interval
+        self._build = build
+        self._current = None       # (version, datasets), replaced atomically
+        self._fingerprint = None   # stat fingerprint of the version in _current
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self.last_error, self.last_swap = None, None
+
+    def current(self):
+        return self._current
+
+    def refresh(self):
+        """Rebuilds if the file changed; True when a new version was swapped in"""
+        with self._refresh_lock:
+            fingerprint = source_fingerprint(self.path)
+            if fingerprint == self._fingerprint or fingerprint.startswith("missing:"): return False
+            try: version = "sha256:" + content_hash(self.path)
+            except OSError: return False  # Replaced mid-poll; next poll retries
+            if self._current is not None and self._current[0] == version:
+                self._fingerprint = fingerprint  # Touched, same content: keep the built dataset
+                return False
+
+            # Background builds get their own trace in the profile log; a synchronous build (start())
+            # stays nested in the calling rerun's trace
+            if threading.current_thread() is self._thread: start_trace(f"hot reload: {self.path}")
+            try: datasets = self._build(self.path)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+            # Unreadable workbooks come back as total=None / per-sheet errors instead of raising
+            failure = build_failure(datasets)
+            if failure is not None:
+                self.last_error = failure
+                return False
+            # The file was rewritten while building (e.g. a copy still in progress): retry next poll
+            if source_fingerprint(self.path) != fingerprint: return False
+
+            self._current, self._fingerprint = (version, datasets), fingerprint
+            self.last_error, self.last_swap = None, time.time()
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def start(self):
+        """Builds the current version synchronously, then keeps polling on a daemon thread"""
+        self.refresh()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join()
@@ -0,0 +1,99 @@
+"""Opt-in parallel workbook ingestion, one worker process per dataset sheet (DASHBOARD_PARALLEL_LOAD=1)"""
+import io
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_loader import (
+    SHEET_KEYWORDS, _is_xlsx, _load_workbook, _find_sheet, _parse_sheets, _csv_fallback, stream_total_df,
+    process_total_df, process_rate_df
+)
+
+PARALLEL_ENV = "DASHBOARD_PARALLEL_LOAD"
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def parallel_enabled():
+    return os.environ.get(PARALLEL_ENV, "").lower() in ("1", "true", "yes")
+
+def _portable_source(source):
+    """Picklable form of a workbook source: local paths as-is, uploads as (name, bytes)"""
+    if hasattr(source, 'getvalue'): return (source.name, source.getvalue())
+    return source
+
+def _restore_source(source):
+    if not isinstance(source, tuple): return source
+    name, data = source
+    upload = io.BytesIO(data)
+    upload.name = name
+    return upload
+
+def _ingest_sheet(key, source):
+    """Worker: reads and processes one dataset sheet -> (frame or None, error message or None)"""
+    source = _restore_source(source)
+    sheet_keyword = SHEET_KEYWORDS[key][0]
+    try:
+        frame, raw = None, None
+        # An unreadable workbook raises here and becomes this sheet's error, not an absent sheet
+        wb = _load_workbook(source) if _is_xlsx(source) else None
+        if wb is not None:
+            try:
+                sheet = _find_sheet(wb.sheetnames, sheet_keyword)
+                if key == "total" and sheet is not None: frame = stream_total_df(wb[sheet])
+                if frame is None: raw = _parse_sheets(wb, (key,)).get(key)
+            finally: wb.close()
+        if frame is None:
+            if raw is None: raw = _csv_fallback({key: None})[key]
+            if raw is None: return None, None  # No sheet or CSV: an absent dataset, as in ingest_workbook
+            frame = process_total_df(raw) if key == "total" else process_rate_df(raw)
+            if frame is None: return None, f"'{sheet_keyword}' could not be parsed"
+        return frame, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _mp_context():
+    # forkserver: safe to start from Streamlit's threads, and preloading data_loader keeps worker start-up cheap
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(["data_loader"])
+        return ctx
+    return mp.get_context("spawn")
+
+def _get_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None: _POOL = ProcessPoolExecutor(max_workers=len(SHEET_KEYWORDS), mp_context=_mp_context())
+        return _POOL
+
+def _reset_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None: _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+def ingest_workbook_parallel(source):
+    """ingest_workbook with every dataset sheet parsed and processed in its own worker process.
+
+    The result carries an extra 'errors' entry mapping each failed dataset to its message. If the pool
+    itself cannot run (no worker processes, broken pool, unpicklable source) the same per-sheet
+    workers run one after another in this process instead.
+    """
+    portable = _portable_source(source)
+    try:
+        pool = _get_pool()
+        futures = {key: pool.submit(_ingest_sheet, key, portable) for key in SHEET_KEYWORDS}
+        results = {key: future.result() for key, future in futures.items()}
+    except Exception:
+        _reset_pool()
+        results = {key: _ingest_sheet(key, portable) for key in SHEET_KEYWORDS}
+
+    datasets = {key: frame for key, (frame, _) in results.items()}
+    # Same contract as build_datasets: rate frames are never None
+    for key in ("suspension", "failure"):
+        if datasets[key] is None: datasets[key] = pd.DataFrame()
+    datasets["errors"] = {key: error for key, (_, error) in results.items() if error}
+    return datasets
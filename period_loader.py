@@ -0,0 +1,122 @@
+"""Dated 시각화(MMDD) sheets of one or more workbooks as a single period-indexed df_total"""
+import glob
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from data_loader import (TOTAL_DIMENSIONS, _open_workbook, source_fingerprint, stream_total_df, process_total_df,
+                         concat_compact)
+
+PERIOD_SHEET = re.compile(r"시각화\s*\(\s*(\d{2})(\d{2})\s*\)")
+FILE_YEAR = re.compile(r"(20\d{2})")
+FILE_CACHE_ENTRIES = 64
+
+_FILE_CACHE = OrderedDict()  # fingerprint -> ({(month, day): df_total}, {sheet: error})
+_FILE_CACHE_LOCK = threading.Lock()
+
+def workbook_paths(sources):
+    """.xlsx paths from a directory, a single path or a list of either (Excel lock files skipped), sorted"""
+    if isinstance(sources, (str, os.PathLike)): sources = [sources]
+    paths = []
+    for src in sources:
+        src = os.fspath(src)
+        if os.path.isdir(src): paths += glob.glob(os.path.join(src, "*.xlsx"))
+        else: paths.append(src)
+    return sorted(p for p in paths if not os.path.basename(p).startswith("~$"))
+
+def workbook_year(path, default=None):
+    """Reporting year of a workbook from the 20YY in its file name, else 'default'; ValueError if neither"""
+    match = FILE_YEAR.search(os.path.basename(path))
+    if match: return int(match.group(1))
+    if default: return default
+    # The file's mtime is no substitute: a December cut-off saved in January would land in the next year
+    raise ValueError(f"{path}: no reporting year (20YY) in the file name; rename it or pass year=")
+
+def sheet_date(sheet_name):
+    """'시각화(0901)' -> (9, 1); None for undated sheets"""
+    match = PERIOD_SHEET.search(sheet_name)
+    return None if not match else tuple(map(int, match.groups()))
+
+def _read_dated_sheets(path):
+    """({(month, day): df_total}, {sheet: error}) of one workbook's dated 시각화 sheets, cached per file version.
+
+    Sheets the streaming reader can't handle are read and processed the regular way; a sheet that still
+    fails (or an unreadable workbook, under the key '*') is reported instead.
+    """
+    key = source_fingerprint(path)
+    with _FILE_CACHE_LOCK:
+        if key in _FILE_CACHE:
+            _FILE_CACHE.move_to_end(key)
+            return _FILE_CACHE[key]
+
+    sheets, errors = {}, {}
+    wb = _open_workbook(path)
+    if wb is None: errors["*"] = "unreadable workbook"
+    else:
+        try:
+            for sheet in wb.sheetnames:
+                date = sheet_date(sheet)
+                if date is None: continue
+                df = stream_total_df(wb[sheet])
+                if df is None:
+                    try: df = process_total_df(pd.ExcelFile(wb, engine="openpyxl").parse(sheet, header=None))
+                    except Exception: df = None
+                if df is None: errors[sheet] = "could not be parsed"
+                elif not df.empty: sheets[date] = df
+        finally: wb.close()
+
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[key] = (sheets, errors)
+        while len(_FILE_CACHE) > FILE_CACHE_ENTRIES: _FILE_CACHE.popitem(last=False)
+    return sheets, errors
+
+def read_workbook_periods(path, year=None, errors=None, as_of=None):
+    """{기준일: df_total} for every dated 시각화 sheet of one workbook.
+
+    The year comes from the file name, else from 'year', else per sheet from 'as_of' (the latest date the
+    workbook's data covers: each MMDD takes the latest year that isn't after it). It is only needed when
+    the workbook has dated sheets (ValueError otherwise). Failed sheets go to 'errors' ({"path[: sheet]": message}).
+    """
+    sheets, sheet_errors = _read_dated_sheets(path)
+    if errors is not None:
+        for sheet, error in sheet_errors.items():
+            errors[path if sheet == "*" else f"{path}: {sheet}"] = error
+    if not sheets: return {}
+    try: year = workbook_year(path, year)
+    except ValueError:
+        if as_of is None: raise
+        year = None
+    periods = {}
+    for (month, day), df in sheets.items():
+        sheet_year = year or (as_of.year - 1 if month > as_of.month else as_of.year)
+        try: periods[pd.Timestamp(year=sheet_year, month=month, day=day)] = df
+        except ValueError: continue  # Impossible date (e.g. 0229 outside a leap year)
+    return periods
+
+def load_periods(sources, year=None, errors=None, as_of=None):
+    """One period-indexed df_total ('기준일' + the usual columns) over all dated sheets of all workbooks.
+
+    'as_of' maps a path (e.g. the served workbook) to the date its data covers, see read_workbook_periods.
+    With an 'errors' dict, a workbook that fails (no year, unreadable) is recorded there and skipped
+    instead of raising. When two workbooks carry the same 기준일, the later path (sorted order) wins.
+    """
+    as_of = {os.path.abspath(p): d for p, d in (as_of or {}).items()}
+    periods = {}
+    for path in workbook_paths(sources):
+        try: periods.update(read_workbook_periods(path, year, errors, as_of.get(os.path.abspath(path))))
+        except ValueError as e:
+            if errors is None: raise
+            errors[path] = str(e)
+    if not periods: return None
+
+    frames = []
+    for period in sorted(periods):
+        df = periods[period]
+        frames.append(pd.concat([pd.DataFrame({"기준일": pd.Series(period, index=df.index, dtype="datetime64[us]")}), df], axis=1))
+    return concat_compact(frames, TOTAL_DIMENSIONS)
+
+def clear_cache():
+    with _FILE_CACHE_LOCK: _FILE_CACHE.clear()
@@ -0,0 +1,12 @@
+"""Processed datasets plus their derived tables, shared by app.py, data_api.py and warmup.py"""
+from analytics import build_metric_store, build_rollup_cube, build_trend_index
+from snapshot import SNAPSHOT_DIR, shared_datasets
+
+def prepare_datasets(source, snapshot_dir=SNAPSHOT_DIR):
+    """Processed long-format frames plus the derived metric store / rollup cube / trend indexes"""
+    datasets = shared_datasets(source, snapshot_dir)
+    datasets["metrics"] = build_metric_store(datasets["total"])
+    datasets["cube"] = build_rollup_cube(datasets["total"], datasets["metrics"])
+    datasets["susp_trend"] = build_trend_index(datasets["suspension"])
+    datasets["fail_trend"] = build_trend_index(datasets["failure"])
+    return datasets
@@ -0,0 +1,125 @@
+"""Per-stage wall time / rows / memory traces of the pipeline, logged as JSON lines and exportable as Chrome traces"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER = logging.getLogger("dashboard.profile")
+PROFILE_LOG_ENV = "DASHBOARD_PROFILE_LOG"
+TRACE_COLUMNS = ["stage", "depth", "start_ms", "wall_ms", "rows_in", "rows_out", "mem_delta_mb"]
+
+_local = threading.local()
+
+def _configure_logging():
+    path = os.environ.get(PROFILE_LOG_ENV)
+    if not path or any(getattr(h, "_profile_log", False) for h in LOGGER.handlers): return
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._profile_log = True
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(logging.INFO)
+
+_configure_logging()
+
+def _rss_bytes():
+    """Resident set size of this process from /proc (Linux), else None"""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError): return None
+
+def count_rows(obj):
+    """Rows of a DataFrame/array, summed over a dict of them; None for anything else"""
+    if isinstance(obj, dict):
+        counts = [count_rows(v) for v in obj.values()]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if shape else None
+
+class Trace:
+    """Stage records of one rerun (or one background build), in start order"""
+
+    def __init__(self, label=""):
+        self.label, self.started = label, time.time()
+        self.records, self._stack = [], []
+        self._t0 = time.perf_counter()
+
+    def begin(self, name, rows_in=None):
+        rec = {"stage": name, "depth": len(self._stack), "rows_in": rows_in, "rows_out": None,
+               "_t": time.perf_counter(), "_rss": _rss_bytes()}
+        rec["start_ms"] = (rec["_t"] - self._t0) * 1000
+        self._stack.append(rec)
+        self.records.append(rec)
+        return rec
+
+    def end(self, rec, rows_out=None):
+        rec["wall_ms"] = (time.perf_counter() - rec.pop("_t")) * 1000
+        rss0, rss1 = rec.pop("_rss"), _rss_bytes()
+        rec["mem_delta_mb"] = None if rss0 is None or rss1 is None else (rss1 - rss0) / 2**20
+        if rows_out is not None: rec["rows_out"] = rows_out
+        self._stack = [r for r in self._stack if r is not rec]
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info(json.dumps({"trace": self.label, "ts": self.started, **{k: rec.get(k) for k in TRACE_COLUMNS}}, ensure_ascii=False))
+        return rec
+
+    def rows(self):
+        """Finished stage records (dicts keyed by TRACE_COLUMNS)"""
+        return [{k: rec.get(k) for k in TRACE_COLUMNS} for rec in self.records if "wall_ms" in rec]
+
+    def to_json(self):
+        return json.dumps({"label": self.label, "started": self.started, "stages": self.rows()}, ensure_ascii=False, indent=1)
+
+    def to_chrome_trace(self):
+        """Chrome trace-event JSON: one complete ('X') event per stage"""
+        events = [{
+            "name": rec["stage"], "ph": "X", "pid": os.getpid(), "tid": 0,
+            "ts": round(rec["start_ms"] * 1000), "dur": round(rec["wall_ms"] * 1000),
+            "args": {k: rec[k] for k in ("rows_in", "rows_out", "mem_delta_mb") if rec[k] is not None}
+        } for rec in self.rows()]
+        return json.dumps({"traceEvents": events, "otherData": {"label": self.label, "started": self.started}}, ensure_ascii=False)
+
+def start_trace(label=""):
+    """Starts a fresh trace for the current thread (one per Streamlit rerun) and returns it"""
+    _local.trace = Trace(label)
+    return _local.trace
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+def tag_stage(tag):
+    """Appends ' [tag]' to the innermost open stage of the current trace, e.g. which path the call took"""
+    trace = current_trace()
+    if trace is not None and trace._stack: trace._stack[-1]["stage"] += f" [{tag}]"
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Times the enclosed block as one stage of the current trace; yields the record (or None when inactive)"""
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    rec = trace.begin(name, rows_in)
+    try: yield rec
+    finally: trace.end(rec)
+
+def profiled(name=None):
+    """Decorator: records each call as a stage, rows_in from the first frame-like argument, rows_out from the result"""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = current_trace()
+            if trace is None: return fn(*args, **kwargs)
+            rows_in = next((n for n in map(count_rows, args) if n is not None), None)
+            rec = trace.begin(label, rows_in)
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally: trace.end(rec, count_rows(result))
+        return wrapper
+    return decorate
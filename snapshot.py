@@ -0,0 +1,180 @@
+"""Hash-checked Feather snapshots of the processed datasets (run: python snapshot.py [data.xlsx] --out .snapshot)"""
+import argparse
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from data_loader import DEFAULT_EXCEL_FILE, PIPELINE_VERSION, content_hash, ingest_workbook
+from parallel_loader import parallel_enabled, ingest_workbook_parallel
+from profiling import profiled
+
+SNAPSHOT_DIR = ".snapshot"
+SNAPSHOT_FORMAT = 3  # 2: categorical dimensions, float32 values; 3: one record batch, NaN kept (no nulls)
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_TABLES = ("total", "suspension", "failure")
+# Per-content-hash stores published at runtime; one directory per workbook version, parsed once for all processes,
+# whose frames view the mapped files (only the short category label lists are copied into each process)
+SHARED_DIR = os.environ.get("DASHBOARD_SHARED_DIR", os.path.join(tempfile.gettempdir(), "dashboard-datasets"))
+SHARED_KEEP = 8  # Workbook versions kept in the shared store; least recently used ones are evicted
+
+def _manifest_path(out_dir):
+    return os.path.join(out_dir, MANIFEST_FILE)
+
+def read_manifest(out_dir=SNAPSHOT_DIR):
+    """Parsed manifest.json of a snapshot directory, or None if missing/unreadable/built by another format or pipeline"""
+    try:
+        with open(_manifest_path(out_dir), encoding="utf-8") as f: manifest = json.load(f)
+    except (OSError, ValueError): return None
+    if manifest.get("format_version") != SNAPSHOT_FORMAT or manifest.get("pipeline_version") != PIPELINE_VERSION: return None
+    return manifest
+
+def _arrow_table(df):
+    """Arrow table of a processed frame; float NaN stays NaN (from_pandas stores it as a null, which can't be viewed)"""
+    df = df.reset_index(drop=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, name in enumerate(df.columns):
+        if df[name].dtype.kind == "f": table = table.set_column(i, name, pa.array(df[name].to_numpy(), from_pandas=False))
+    return table
+
+@profiled()
+def write_snapshot(datasets, source_hash, out_dir=SNAPSHOT_DIR, source_name=None):
+    """Writes build_datasets() output + manifest; the manifest is replaced last so readers never see a half-written snapshot"""
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {}
+    for key in SNAPSHOT_TABLES:
+        df = datasets.get(key)
+        if df is None: tables[key] = None; continue
+        file_name = f"{key}.feather"
+        tmp = os.path.join(out_dir, f"{file_name}.{os.getpid()}.tmp")
+        # Uncompressed and one record batch, so map_table can view every column in place
+        feather.write_feather(_arrow_table(df), tmp, compression="uncompressed", chunksize=max(len(df), 1))
+        os.replace(tmp, os.path.join(out_dir, file_name))
+        tables[key] = {"file": file_name, "rows": len(df), "columns": list(df.columns)}
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT,
+        "pipeline_version": PIPELINE_VERSION,
+        "source": source_name,
+        "source_hash": source_hash,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tables": tables
+    }
+    tmp = f"{_manifest_path(out_dir)}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _manifest_path(out_dir))
+    return manifest
+
+def _ingest(source, parallel=None):
+    """ingest_workbook, or the process-pool loader when enabled (argument or DASHBOARD_PARALLEL_LOAD)"""
+    if parallel is None: parallel = parallel_enabled()
+    return ingest_workbook_parallel(source) if parallel else ingest_workbook(source)
+
+def compile_snapshot(source=DEFAULT_EXCEL_FILE, out_dir=SNAPSHOT_DIR, parallel=None, source_hash=None):
+    """Parses the workbook (path or upload) once and stores its long-format frames as a snapshot"""
+    datasets = _ingest(source, parallel)
+    if datasets.get("errors"): raise ValueError("; ".join(f"{k}: {e}" for k, e in datasets["errors"].items()))
+    name = getattr(source, "name", source)
+    return write_snapshot(datasets, source_hash or content_hash(source), out_dir, source_name=str(name))
+
+def _mapped_column(column):
+    """pandas array over one column of a memory-mapped table, viewing its buffers where possible.
+
+    Dictionary columns become Categoricals over the mapped indices (only the labels are copied); null-free
+    primitive columns are numpy views. Chunked or null-holding columns fall back to a converted copy.
+    """
+    if column.num_chunks != 1 or column.null_count: return column.to_pandas().array
+    chunk = column.chunk(0)
+    if pa.types.is_dictionary(chunk.type):
+        categories = pd.Index(chunk.dictionary.to_pylist(), dtype="str")
+        return pd.Categorical.from_codes(chunk.indices.to_numpy(zero_copy_only=True), categories=categories)
+    try: return chunk.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid: return column.to_pandas().array
+
+def map_table(path):
+    """Feather file as a DataFrame whose columns view the memory-mapped file (see _mapped_column)"""
+    table = feather.read_table(path, memory_map=True)
+    return pd.DataFrame({name: _mapped_column(table.column(name)) for name in table.column_names}, copy=False)
+
+@profiled()
+def load_snapshot(source=DEFAULT_EXCEL_FILE, out_dir=SNAPSHOT_DIR, source_hash=None):
+    """{'total', 'suspension', 'failure'} from a fresh snapshot of 'source', or None (missing, stale or unreadable)"""
+    manifest = read_manifest(out_dir)
+    if manifest is None: return None
+    try:
+        if manifest.get("source_hash") != (source_hash or content_hash(source)): return None
+        datasets = {}
+        for key in SNAPSHOT_TABLES:
+            meta = manifest["tables"].get(key)
+            datasets[key] = None if meta is None else map_table(os.path.join(out_dir, meta["file"]))
+        return datasets
+    except Exception: return None
+
+def _private_dir(path):
+    """Creates 'path' as 0700 if needed; True only for a real directory owned by this user and closed to others"""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode): return False
+        if hasattr(os, "getuid"):
+            if st.st_uid != os.getuid(): return False
+            if st.st_mode & 0o077: os.chmod(path, 0o700)  # Store created by an older build with the default umask
+    except OSError: return False
+    return True
+
+def evict_shared(shared_dir=SHARED_DIR, keep=SHARED_KEEP):
+    """Deletes all but the 'keep' most recently used workbook versions (by directory mtime) from the shared store"""
+    try: entries = [e for e in os.scandir(shared_dir) if e.is_dir(follow_symlinks=False)]
+    except OSError: return
+    entries.sort(key=lambda e: e.stat(follow_symlinks=False).st_mtime, reverse=True)
+    # Processes still mapping an evicted version keep their views; unlinked files live until unmapped
+    for entry in entries[keep:]: shutil.rmtree(entry.path, ignore_errors=True)
+
+def shared_datasets(source, snapshot_dir=SNAPSHOT_DIR, shared_dir=SHARED_DIR):
+    """Datasets for 'source': compiled snapshot if fresh, else the shared store (published on first use)"""
+    try: source_hash = content_hash(source)
+    except OSError: return _ingest(source)  # No workbook: CSV fallback, nothing to share
+    if isinstance(source, str):
+        datasets = load_snapshot(source, snapshot_dir, source_hash)
+        if datasets is not None: return datasets
+
+    # Only a private store we own is trusted: anyone else could read the data or plant a manifest
+    if not _private_dir(shared_dir): return _ingest(source)
+    store_dir = os.path.join(shared_dir, source_hash)
+    datasets = load_snapshot(source, store_dir, source_hash)
+    if datasets is not None:
+        try: os.utime(store_dir)  # Mark as recently used for eviction
+        except OSError: pass
+        return datasets
+
+    datasets = _ingest(source)
+    # Never publish a store with a failed sheet or an unreadable workbook (total=None)
+    if datasets.get("errors") or datasets.get("total") is None: return datasets
+    try: write_snapshot(datasets, source_hash, store_dir, source_name=str(getattr(source, "name", source)))
+    except OSError: return datasets  # Read-only / full tmp: serve the private copy
+    evict_shared(shared_dir)
+    return load_snapshot(source, store_dir, source_hash) or datasets
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=DEFAULT_EXCEL_FILE, help="workbook to compile")
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--parallel", action="store_true", help="parse the sheets in worker processes")
+    args = parser.parse_args()
+    if not os.path.exists(args.source): parser.error(f"{args.source} not found")
+
+    t0 = time.perf_counter()
+    try: manifest = compile_snapshot(args.source, args.out, parallel=args.parallel or None)
+    except ValueError as e: parser.exit(1, f"compile failed: {e}\n")
+    print(f"compiled {args.source} -> {args.out} in {time.perf_counter() - t0:.2f}s (sha256 {manifest['source_hash'][:12]})")
+    for key, meta in manifest["tables"].items():
+        print(f"  {key:<11}: " + ("(no data)" if meta is None else f"{meta['rows']:,} rows -> {meta['file']}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import pipeline
+from bench_pipeline import make_total_sheet, make_rate_sheet
+from data_api import DataService
+from period_loader import clear_cache, load_periods
+from snapshot import shared_datasets
+
+def write_workbook(path, sheets):
+    wb = Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(name)
+        for row in df.itertuples(index=False):
+            ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+    wb.save(path)
+
+def make_period_dir(tmp_path):
+    write_workbook(tmp_path / "report_2024_12.xlsx", {"시각화(1201)": make_total_sheet(60, 1)})
+    write_workbook(tmp_path / "report_2025_01.xlsx", {"시각화(0101)": make_total_sheet(60, 2)})
+    # The served source: no 20YY, current cut-off sheet, rate data up to 2025-02 (2016-01 + 109 months)
+    write_workbook(tmp_path / "data.xlsx", {"시각화(0201)": make_total_sheet(60, 3),
+                                             "기관정지율": make_rate_sheet(10, 110), "기관부실율": make_rate_sheet(10, 110, 1)})
+    write_workbook(tmp_path / "bad.xlsx", {"Sheet": make_total_sheet(10, 4)})  # Undated: not a period workbook
+    write_workbook(tmp_path / "notes.xlsx", {"시각화(0301)": make_total_sheet(10, 5)})  # Dated, but no year anywhere
+    clear_cache()
+    return tmp_path
+
+def test_file_year_wins_over_explicit_year(tmp_path):
+    make_period_dir(tmp_path)
+    periods = load_periods([tmp_path / "report_2024_12.xlsx", tmp_path / "report_2025_01.xlsx"], year=2025)
+    assert list(periods["기준일"].unique()) == [pd.Timestamp("2024-12-01"), pd.Timestamp("2025-01-01")]
+
+def test_served_workbook_dated_from_its_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "shared_datasets", partial(shared_datasets, shared_dir=str(tmp_path / "shared")))
+    service = DataService(str(make_period_dir(tmp_path) / "data.xlsx"))
+    deltas = service.period_deltas()
+    periods = deltas["value"].index.get_level_values("기준일").unique().sort_values()
+    assert list(periods) == [pd.Timestamp("2024-12-01"), pd.Timestamp("2025-01-01"), pd.Timestamp("2025-02-01")]
+    # The stray undated workbook is no period workbook; the dated one without a year is skipped and reported
+    assert list(deltas["errors"]) == [str(tmp_path / "notes.xlsx")]
+    assert set(service.period_changes("강남", deltas=deltas).columns) == {"지표", "값", "이전값", "증감"}